@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+(c) 2026 Brant Faircloth || http://faircloth-lab.org/
+All rights reserved.
+
+This code is distributed under a 3-clause BSD license. Please see
+LICENSE.txt for more information.
+
+Created on Oct 18, 2026.
+
+Shared database access for the scripts in database/.  Reads access.conf,
+builds one pooled engine for the openwings database, and provides chunked
+reads over server-side (named) cursors for large result sets.
+"""
+
+import os
+import atexit
+import threading
+import configparser
+
+import pandas as pd
+from sqlalchemy import create_engine, event, text
+
+import query_log
+
+
+# searched in order when no --access-path is given
+ACCESS_CONF_PATHS = (
+    os.environ.get('OPENWINGS_ACCESS_CONF', ''),
+    'access.conf',
+    os.path.expanduser('~/access.conf'),
+)
+
+# when set (by benchmark.py), each engine appends the number of statements
+# it executed to this file at exit
+QUERY_COUNT_ENV = 'OPENWINGS_QUERY_COUNT'
+
+
+def add_access_arguments(parser, pool_size=5):
+    """Add the shared database options to an argparse parser"""
+    parser.add_argument(
+        '--access-path',
+        default=None,
+        help="""The path to the database access.conf file (default: $OPENWINGS_ACCESS_CONF, ./access.conf, ~/access.conf)."""
+    )
+    parser.add_argument(
+        '--pool-size',
+        type=int,
+        default=pool_size,
+        help="""The number of pooled database connections."""
+    )
+    parser.add_argument(
+        '--profile-queries',
+        action='store_true',
+        default=False,
+        help="""Time every query and print a ranked slow-query report at exit."""
+    )
+    parser.add_argument(
+        '--query-log',
+        default=None,
+        help="""Also write every query (shape, view, params, elapsed, rows) as JSON lines to this file (implies --profile-queries)."""
+    )
+    return parser
+
+
+def find_access_conf(path=None):
+    if path is not None:
+        if not os.path.isfile(path):
+            raise IOError("{0} is not a file".format(path))
+        return path
+    for candidate in ACCESS_CONF_PATHS:
+        if candidate and os.path.isfile(candidate):
+            return candidate
+    raise IOError("Cannot find access.conf; pass --access-path or set OPENWINGS_ACCESS_CONF")
+
+
+def get_connection_string(path=None):
+    db_conf = configparser.ConfigParser()
+    db_conf.read(find_access_conf(path))
+    openwings = db_conf['openwings']
+    return "postgresql://{0}:{1}@{2}:{3}/{4}".format(
+            openwings['user'],
+            openwings['password'],
+            openwings.get('host', 'localhost'),
+            openwings.get('port', '5432'),
+            openwings.get('database', 'openwings')
+        )
+
+
+def get_engine(path=None, pool_size=5, max_overflow=0):
+    """Return a pooled engine; max_overflow=0 keeps concurrent users bounded
+    by pool_size"""
+    engine = create_engine(
+        get_connection_string(path),
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_pre_ping=True
+    )
+    if os.environ.get(QUERY_COUNT_ENV):
+        count_statements(engine, os.environ[QUERY_COUNT_ENV])
+    return engine
+
+
+def count_statements(engine, path):
+    """Count statements executed on engine and append the total to path at exit"""
+    counter = {'statements': 0}
+    lock = threading.Lock()
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def count(connection, cursor, statement, parameters, context, executemany):
+        with lock:
+            counter['statements'] += 1
+
+    def write():
+        with open(path, 'a') as outfile:
+            outfile.write("{}\n".format(counter['statements']))
+
+    atexit.register(write)
+    return counter
+
+
+def get_engine_from_args(args, pool_size=None, report=True):
+    """Engine for the parsed arguments, instrumented with --profile-queries or
+    --query-log; report=False only writes the JSON lines, with no report at
+    exit"""
+    engine = get_engine(args.access_path, pool_size or args.pool_size)
+    if getattr(args, 'profile_queries', False) or getattr(args, 'query_log', None):
+        # imported here; queries imports this module
+        from queries import VIEWS
+        log = query_log.QueryLog(VIEWS, args.query_log)
+        query_log.instrument(engine, log)
+        if report:
+            query_log.report_at_exit(log)
+        else:
+            atexit.register(log.close)
+    return engine
+
+
+def read_sql_chunks(connection, query, chunksize=10000, params=None):
+    """Yield DataFrames of at most chunksize rows, fetched through a
+    server-side (named) cursor so the full result is never buffered.  Callers
+    that can handle one chunk at a time should iterate this directly.  An
+    empty result yields one empty frame with the result's columns"""
+    if str(query).lstrip().upper().startswith('EXECUTE'):
+        # Postgres cannot DECLARE a cursor FOR EXECUTE
+        raise ValueError("Prepared statements cannot be streamed; stream the statement itself")
+    if isinstance(query, str):
+        query = text(query)
+    # on the statement, not the connection: Connection.execution_options()
+    # changes the connection in place, and every later statement on it
+    # (PREPARE, EXECUTE, EXPLAIN) would be sent through a named cursor
+    result = connection.execute(query.execution_options(stream_results=True), params or {})
+    try:
+        columns = list(result.keys())
+        empty = True
+        while True:
+            rows = result.fetchmany(chunksize)
+            if not rows:
+                break
+            empty = False
+            yield pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+        if empty:
+            yield pd.DataFrame(columns=columns)
+    finally:
+        result.close()
+
+
+def read_sql_streamed(connection, query, chunksize=10000, params=None):
+    """Read a large result over a server-side cursor, chunk by chunk, into
+    one DataFrame"""
+    return pd.concat(list(read_sql_chunks(connection, query, chunksize, params)), ignore_index=True)
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+(c) 2026 Brant Faircloth || http://faircloth-lab.org/
+All rights reserved.
+
+This code is distributed under a 3-clause BSD license. Please see
+LICENSE.txt for more information.
+
+Created on Oct 18, 2026.
+
+End-to-end benchmark of the database scripts against synthetic openwings
+databases (see make_synthetic_openwings.py).  For every scale, the database
+is regenerated and each entry point is run as its own process in a scratch
+directory, recording wall time, the number of SQL statements executed and
+peak RSS.  Results are appended to a CSV so runs can be compared against a
+baseline:
+
+    python benchmark.py --access-path bench.conf --scales 1000:2:5000 10000:3:50000 \\
+        --results bench.csv --baseline bench-baseline.csv
+
+Scales are SPECIES:SYNONYMS:SPECIMENS (alternate names per species,
+records per museum view).  Run once plain and once with --migrate (which
+applies migrations.py after generating each database) to measure the
+indexes.  Point --access-path at a scratch database: it is
+overwritten.
+"""
+
+import os
+import sys
+import csv
+import time
+import shutil
+import argparse
+import subprocess
+from datetime import datetime
+
+import access
+import migrations
+import make_synthetic_openwings
+
+
+# name, script, arguments, needs the database
+ENTRY_POINTS = (
+    ('holdings_by_family', 'get_holdings_by_family.py', [], True),
+    ('holdings_by_species', 'get_holdings_by_species.py', [], True),
+    ('holdings_family_count', 'get_holdings_family_count.py', [], True),
+    ('across_taxonomies', 'get_holdings_by_species_across_taxonomies.py', [], True),
+    ('specific_species', 'get_holdings_by_specific_species_across_taxonomies.py', ['--species-config', '{inputs}/species.conf'], True),
+    ('tissue_v1', 'get_tissue_holdings.py', ['--species-spreadsheet', '{inputs}/species.xlsx'], True),
+    ('tissue_v2', 'get_tissue_holdings_v2.py', ['--species-spreadsheet', '{inputs}/species.csv'], True),
+    ('merge_down', 'merge_down_results_for_species.py', ['--species-files', '{work}/across_taxonomies', '--output', '{work}/merge_down/output'], False),
+)
+
+RESULT_COLUMNS = ('run', 'migrated', 'species', 'synonyms', 'specimens', 'entry_point', 'seconds', 'queries', 'peak_rss_mb', 'returncode')
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description="""Benchmark the database scripts against synthetic databases""",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        '--scales',
+        nargs='+',
+        default=['1000:2:5000'],
+        help="""The scales to run, as SPECIES:SYNONYMS:SPECIMENS."""
+    )
+    parser.add_argument(
+        '--entry-points',
+        nargs='+',
+        default=[entry[0] for entry in ENTRY_POINTS],
+        choices=[entry[0] for entry in ENTRY_POINTS],
+        help="""The entry points to run."""
+    )
+    parser.add_argument(
+        '--work',
+        default='benchmark-work',
+        help="""The scratch directory for script outputs."""
+    )
+    parser.add_argument(
+        '--results',
+        default='benchmark-results.csv',
+        help="""The CSV to which results are appended."""
+    )
+    parser.add_argument(
+        '--baseline',
+        default=None,
+        help="""A results CSV to compare against (matched on scale and entry point)."""
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=1,
+        help="""The random seed for the synthetic data."""
+    )
+    parser.add_argument(
+        '--migrate',
+        action='store_true',
+        default=False,
+        help="""Apply the index migrations to each generated database before running."""
+    )
+    access.add_access_arguments(parser)
+    return parser.parse_args()
+
+
+def parse_scale(scale):
+    species, synonyms, specimens = [int(value) for value in scale.split(':')]
+    return species, synonyms, specimens
+
+
+def run_entry_point(script, arguments, cwd, access_path=None):
+    """Run one script; return (seconds, statements, peak RSS in MB, returncode)"""
+    count_path = os.path.join(cwd, '.query_count')
+    environment = dict(os.environ, **{access.QUERY_COUNT_ENV: count_path})
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), script)] + arguments
+    if access_path is not None:
+        command += ['--access-path', access_path]
+    with open(os.path.join(cwd, 'stdout.log'), 'w') as stdout:
+        start = time.time()
+        process = subprocess.Popen(command, cwd=cwd, env=environment, stdout=stdout, stderr=subprocess.STDOUT)
+        # wait4 gives this child's own rusage, not the running max over all children
+        pid, status, usage = os.wait4(process.pid, 0)
+        seconds = time.time() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    statements = 0
+    if os.path.isfile(count_path):
+        with open(count_path) as infile:
+            statements = sum([int(line) for line in infile if line.strip()])
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    divisor = 1024.0 * 1024.0 if sys.platform == 'darwin' else 1024.0
+    return seconds, statements, usage.ru_maxrss / divisor, process.returncode
+
+
+def run_scale(args, run, scale, engine, access_path):
+    species, synonyms, specimens = parse_scale(scale)
+    work = os.path.abspath(os.path.join(args.work, "{}-{}-{}".format(species, synonyms, specimens)))
+    inputs = os.path.join(work, 'inputs')
+    print("Generating {} species, {} synonyms, {} specimens per museum...".format(species, synonyms, specimens))
+    reference = make_synthetic_openwings.generate(engine, species, synonyms, specimens, args.seed, replace=True)
+    make_synthetic_openwings.write_inputs(inputs, reference, seed=args.seed)
+    if args.migrate:
+        migrations.migrate(engine)
+    results = []
+    for name, script, arguments, database in ENTRY_POINTS:
+        if name not in args.entry_points:
+            continue
+        cwd = os.path.join(work, name)
+        if os.path.exists(cwd):
+            shutil.rmtree(cwd)
+        os.makedirs(cwd)
+        arguments = [argument.format(inputs=inputs, work=work) for argument in arguments]
+        seconds, statements, rss, returncode = run_entry_point(script, arguments, cwd, access_path if database else None)
+        print("\t{:<24}{:>10.2f} s{:>10} queries{:>10.1f} MB{}".format(
+            name, seconds, statements, rss, '' if returncode == 0 else "  (exit {})".format(returncode)
+        ))
+        results.append(dict(zip(RESULT_COLUMNS, (run, args.migrate, species, synonyms, specimens, name, round(seconds, 3), statements, round(rss, 1), returncode))))
+    return results
+
+
+def write_results(path, results):
+    exists = os.path.isfile(path)
+    with open(path, 'a', newline='') as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=RESULT_COLUMNS)
+        if not exists:
+            writer.writeheader()
+        for row in results:
+            writer.writerow(row)
+
+
+def compare_to_baseline(path, results):
+    """Print time/query/RSS ratios against the latest matching baseline rows"""
+    baseline = {}
+    with open(path, newline='') as infile:
+        for row in csv.DictReader(infile):
+            baseline[(row['species'], row['synonyms'], row['specimens'], row['entry_point'])] = row
+    print("\nScale,EntryPoint,TimeRatio,QueryRatio,RssRatio")
+    for row in results:
+        key = (str(row['species']), str(row['synonyms']), str(row['specimens']), row['entry_point'])
+        if key not in baseline:
+            continue
+        base = baseline[key]
+        ratios = []
+        for column in ('seconds', 'queries', 'peak_rss_mb'):
+            ratios.append("{:.2f}".format(float(row[column]) / float(base[column])) if float(base[column]) else 'NA')
+        print("{}:{}:{},{},{}".format(row['species'], row['synonyms'], row['specimens'], row['entry_point'], ",".join(ratios)))
+
+
+def main():
+    args = get_args()
+    access_path = os.path.abspath(access.find_access_conf(args.access_path))
+    engine = access.get_engine(access_path, args.pool_size)
+    run = datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
+    results = []
+    for scale in args.scales:
+        results.extend(run_scale(args, run, scale, engine, access_path))
+    write_results(args.results, results)
+    if args.baseline:
+        compare_to_baseline(args.baseline, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+(c) 2026 Brant Faircloth || http://faircloth-lab.org/
+All rights reserved.
+
+This code is distributed under a 3-clause BSD license. Please see
+LICENSE.txt for more information.
+
+Created on Oct 18, 2026.
+
+Shared categorical dtypes for the low-cardinality name columns that every
+query returns (taxon names, institution codes, sex, preparations and the
+coarse locality fields).  Each column has one category list for the whole
+run; it only grows, and is kept sorted, so sorting a categorical column
+orders rows exactly as sorting the strings did.  Frames encoded against the
+same list merge and sort on integer codes.  A frame encoded before the list
+grew still holds the right values but an older dtype; encode() moves it onto
+the current one (adding any values the list lacks, as in frames cached by an
+earlier run), and concat() and merge() encode every frame first.
+
+Free-text columns (locality, remarks, catalognumber) are left as strings:
+nearly every value is distinct, so a dictionary would only add to them.
+"""
+
+import threading
+
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+
+CATEGORICAL_COLUMNS = (
+    'ordr', 'family', 'genus', 'species', 'subspecies', 'icode', 'sex',
+    'preparations', 'prep', 'continent', 'country', 'state', 'county', 'island'
+)
+
+
+def _is_text(values):
+    return (
+        isinstance(values.dtype, CategoricalDtype)
+        or pd.api.types.is_object_dtype(values)
+        or pd.api.types.is_string_dtype(values)
+    )
+
+
+class CategoryDictionary(object):
+    """One growing, sorted category list per column, shared by all frames"""
+    def __init__(self, columns=CATEGORICAL_COLUMNS):
+        self.columns = tuple(columns)
+        self.dtypes = {}
+        self.lock = threading.Lock()
+
+    def dtype(self, column, values=None):
+        """The dtype for column, first adding any new values to its list"""
+        with self.lock:
+            current = self.dtypes.get(column)
+            if values is None:
+                return current
+            new = pd.Index(values.dropna().unique())
+            if current is not None:
+                new = new[~new.isin(current.categories)]
+            if current is None or len(new) > 0:
+                categories = new if current is None else current.categories.append(new)
+                current = CategoricalDtype(categories.unique().sort_values())
+                self.dtypes[column] = current
+            return current
+
+    def encode(self, df):
+        """Store the shared columns of df as categoricals, in place"""
+        for column in self.columns:
+            if column in df.columns and _is_text(df[column]):
+                df[column] = df[column].astype(self.dtype(column, df[column]))
+        return df
+
+    def concat(self, frames, **kwargs):
+        """pd.concat that keeps shared columns categorical"""
+        frames = [self.encode(frame.copy(deep=False)) for frame in frames]
+        return pd.concat(frames, **kwargs)
+
+    def merge(self, left, right, **kwargs):
+        """DataFrame.merge with both sides on the current dtypes, so shared
+        key columns join on their codes"""
+        left = self.encode(left.copy(deep=False))
+        return left.merge(self.encode(right.copy(deep=False)), **kwargs)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+(c) 2026 Brant Faircloth || http://faircloth-lab.org/
+All rights reserved.
+
+This code is distributed under a 3-clause BSD license. Please see
+LICENSE.txt for more information.
+
+Created on Oct 18, 2026.
+
+Shard the per-family work of the holdings reports across processes.  With
+--workers N, families are handed to a pool of N processes, each with its own
+engine and connection.  Each family's stdout is captured in the worker and
+replayed by the parent, and results come back in family order, so files,
+return values and stdout match a serial run.
+
+Given a RunManifest, each family's function returns the paths it wrote;
+finished families are recorded as they complete and, on --resume, families
+the manifest already holds are skipped and their stdout replayed.
+
+Workers are spawned rather than forked so they never share a socket with the
+parent's pool.  --profile-queries reports the parent's queries only; with
+--query-log PATH each worker writes its queries to PATH.<pid>, and prints
+no report of its own.
+"""
+
+import io
+import os
+import sys
+import contextlib
+import multiprocessing
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+import access
+import queries
+
+
+_CONNECTION = None
+
+
+def add_worker_arguments(parser):
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help="""The number of processes (each with its own connection) to shard families across."""
+    )
+
+
+def _start_worker(args):
+    global _CONNECTION
+    args.profile_queries = False
+    if args.query_log:
+        # one file per worker, so lines from different processes never interleave
+        args.query_log = "{}.{}".format(args.query_log, os.getpid())
+    engine = access.get_engine_from_args(args, pool_size=1, report=False)
+    queries.configure_from_args(args)
+    _CONNECTION = engine.connect()
+
+
+def _capture(function, connection, task):
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            result = function(connection, *task)
+    except Exception:
+        # show how far the family got before it failed
+        sys.stdout.write(output.getvalue())
+        raise
+    return result, output.getvalue()
+
+
+def _run_family(function, task):
+    return _capture(function, _CONNECTION, task)
+
+
+def _run_serial(function, tasks, connection):
+    for task in tasks:
+        yield _capture(function, connection, task)
+
+
+def map_families(function, tasks, args, connection, manifest=None):
+    """Yield function(connection, *task) for each task, in task order; the
+    first item of a task is its family.  With args.workers > 1, tasks run in
+    worker processes; function must be a module-level function and tasks
+    picklable.  Families complete in manifest are skipped (yielding None)"""
+    if manifest is None and args.workers <= 1:
+        for task in tasks:
+            yield function(connection, *task)
+        return
+    tasks = list(tasks)
+    done = [manifest.completed(task[0]) if manifest is not None else None for task in tasks]
+    remaining = [task for task, entry in zip(tasks, done) if entry is None]
+    executor = None
+    if args.workers > 1 and remaining:
+        context = multiprocessing.get_context('spawn')
+        executor = ProcessPoolExecutor(max_workers=args.workers, mp_context=context, initializer=_start_worker, initargs=(args,))
+        results = executor.map(partial(_run_family, function), remaining)
+    else:
+        results = _run_serial(function, remaining, connection)
+    try:
+        for task, entry in zip(tasks, done):
+            if entry is not None:
+                sys.stdout.write(entry['output'])
+                yield None
+                continue
+            result, output = next(results)
+            sys.stdout.write(output)
+            if manifest is not None:
+                manifest.record(task[0], files=result or (), output=output)
+            yield result
+    finally:
+        if executor is not None:
+            executor.shutdown()
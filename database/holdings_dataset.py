@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+(c) 2026 Brant Faircloth || http://faircloth-lab.org/
+All rights reserved.
+
+This code is distributed under a 3-clause BSD license. Please see
+LICENSE.txt for more information.
+
+Created on Oct 18, 2026.
+
+Columnar output for the holdings reports.  With --dataset DIR, each report
+also writes its per-family tables into one Parquet dataset per report,
+hive-partitioned by run date, order and family:
+
+    DIR/holdings_by_species/run_date=2026-10-18/ordr=Passeriformes/family=Corvidae/part-0.parquet
+
+Columns are typed (names as strings, counts as nullable integers, flags as
+booleans), and readers can prune partitions instead of opening every file,
+e.g. all families missing from the collaborating museums in one run:
+
+    df = read_holdings_dataset(DIR, 'holdings_by_species_across_taxonomies', run_date='2026-10-18')
+    df[df.all_collab_museums == 0]
+"""
+
+import os
+from datetime import date
+
+import pandas as pd
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+PARTITIONS = ('run_date', 'ordr', 'family')
+
+NAME_COLUMNS = ('ordr', 'family', 'genus', 'species')
+
+
+def add_dataset_arguments(parser):
+    parser.add_argument(
+        '--dataset',
+        default=None,
+        help="""Also write results to a Parquet dataset in this directory, partitioned by run date, order and family (requires pyarrow)."""
+    )
+    return parser
+
+
+def get_family_orders(connection):
+    """Return {family: order} from the reference taxonomy"""
+    df = pd.read_sql_query("""
+        SELECT DISTINCT
+            species.family, species.ordr
+        FROM
+            species;
+        """, con=connection)
+    return dict(zip(df['family'], df['ordr']))
+
+
+def typed_frame(df):
+    """Give every column a definite type so partitions share one schema"""
+    df = df.copy()
+    for column in df.columns:
+        values = df[column]
+        present = values.dropna()
+        if column in NAME_COLUMNS:
+            df[column] = values.astype('string')
+        elif pd.api.types.is_bool_dtype(values):
+            df[column] = values.astype('boolean')
+        elif pd.api.types.is_numeric_dtype(values):
+            if (present % 1 == 0).all():
+                df[column] = values.astype('Int64')
+        elif len(present) > 0 and present.map(lambda x: isinstance(x, bool)).all():
+            # flag columns that picked up NaN in an outer merge
+            df[column] = values.astype('boolean')
+        else:
+            df[column] = values.astype('string')
+    # partition values live in the directory names
+    return df.drop(columns=[column for column in PARTITIONS if column in df.columns])
+
+
+def partition_path(root, report, family, ordr, run_date=None):
+    if run_date is None:
+        run_date = date.today()
+    parts = [
+        "run_date={}".format(run_date),
+        "ordr={}".format(ordr if ordr else '__HIVE_DEFAULT_PARTITION__'),
+        "family={}".format(family)
+    ]
+    return os.path.join(root, report, *parts)
+
+
+def write_family_partition(root, report, df, family, ordr, run_date=None):
+    """Write one family's table; rerunning the same day replaces it"""
+    if pyarrow is None:
+        raise ImportError("--dataset needs pyarrow")
+    path = partition_path(root, report, family, ordr, run_date)
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    typed_frame(df).to_parquet(os.path.join(path, 'part-0.parquet'), index=False)
+    return path
+
+
+def read_holdings_dataset(root, report, **partitions):
+    """Read a report dataset, reading only the partitions that match
+    partitions (e.g. run_date='2026-10-18', family=['Corvidae', 'Picidae'])"""
+    filters = []
+    for column, value in partitions.items():
+        if isinstance(value, (list, tuple, set)):
+            filters.append((column, 'in', [str(v) for v in value]))
+        else:
+            filters.append((column, '=', str(value)))
+    return pd.read_parquet(os.path.join(root, report), filters=filters or None)
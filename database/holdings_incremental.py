@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+(c) 2026 Brant Faircloth || http://faircloth-lab.org/
+All rights reserved.
+
+This code is distributed under a 3-clause BSD license. Please see
+LICENSE.txt for more information.
+
+Created on Oct 18, 2026.
+
+Incremental holdings reports.  With --incremental DIR, each (family, museum)
+cell of a per-family report - the holdings one museum contributes to one
+family - is kept in DIR and reused while its inputs are unchanged:
+
+    reference  versions of species and taxonomies (and holdings_presence
+               with --presence-table); any change invalidates every cell,
+               and if one cannot be versioned no cell is reused
+    museum     the view's version (see result_cache); if it moved since the
+               last run, or cannot be versioned, one scan of the view gives
+               a per-family content hash - the record count and md5 of the
+               sorted (genus, species) of every record filed under a name
+               of the family, in any taxonomy
+
+A cell is recomputed only when the hash of its museum and family changed,
+so a night where one feed changed re-queries that museum's changed
+families and reuses everything else.  The per-family report files are
+still rewritten from the cells.
+"""
+
+import os
+import json
+import pickle
+import hashlib
+
+import pandas as pd
+
+import queries
+import result_cache
+
+
+REFERENCE_TABLES = ('species', 'taxonomies')
+
+
+def add_incremental_arguments(parser):
+    parser.add_argument(
+        '--incremental',
+        default=None,
+        help="""Keep per (family, museum) results in this directory and only recompute cells whose inputs changed."""
+    )
+
+
+def get_family_digests(connection, museum):
+    """Return {family: 'records:md5'} for the records of museum filed under
+    any name (reference or alternate) of a reference species"""
+    if museum not in queries.VIEWS:
+        raise ValueError("{} is not a known view".format(museum))
+    df = pd.read_sql_query("""
+        WITH names AS (
+            SELECT
+                species.family, species.genus, species.species
+            FROM
+                species
+            UNION
+            SELECT
+                species.family, taxonomies.alt_genus, taxonomies.alt_species
+            FROM
+                species,
+                taxonomies
+            WHERE
+                species.genus = taxonomies.genus
+                AND species.species = taxonomies.species
+        )
+        SELECT
+            names.family,
+            count(*) AS records,
+            md5(string_agg({0}.genus || ' ' || {0}.species, ',' ORDER BY {0}.genus, {0}.species)) AS digest
+        FROM
+            {0},
+            names
+        WHERE
+            {0}.genus = names.genus
+            AND {0}.species = names.species
+        GROUP BY
+            names.family;
+        """.format(museum), con=connection)
+    return {family: "{}:{}".format(records, digest) for family, records, digest in df.itertuples(index=False, name=None)}
+
+
+class CellStore(object):
+    """Per (family, museum) results of one report.  Built once in the parent;
+    it holds no connection, so it can be handed to family workers"""
+    def __init__(self, directory, report, connection, museums, presence_table=False):
+        self.root = os.path.join(directory, report)
+        self.state_path = os.path.join(self.root, 'state.json')
+        previous = {}
+        if os.path.isfile(self.state_path):
+            with open(self.state_path) as infile:
+                previous = json.load(infile)
+        versions = result_cache.get_table_versions(connection)
+        tables = REFERENCE_TABLES + (('holdings_presence',) if presence_table else ())
+        reference = [versions.get(table) for table in tables]
+        self.reusable = None not in reference
+        self.reference = "|".join([str(version) for version in reference])
+        if not self.reusable or previous.get('reference') != self.reference:
+            previous = {}
+        self.museums = {}
+        self.scanned = []
+        self.changed = 0
+        for museum in museums:
+            state = previous.get('museums', {}).get(museum)
+            version = versions.get(museum)
+            if state is not None and version is not None and state['version'] == version:
+                families = state['families']
+            else:
+                families = get_family_digests(connection, museum)
+                self.scanned.append(museum)
+                old = state['families'] if state is not None else {}
+                self.changed += len([f for f in set(families) | set(old) if families.get(f) != old.get(f)])
+            self.museums[museum] = {'version': version, 'families': families}
+
+    def fingerprint(self, family, museum):
+        digest = self.museums[museum]['families'].get(family, 'empty')
+        return hashlib.sha1("{}|{}".format(self.reference, digest).encode('utf-8')).hexdigest()
+
+    def path(self, family, museum):
+        name = hashlib.sha1(family.encode('utf-8')).hexdigest()
+        return os.path.join(self.root, 'cells', museum, "{}.pkl".format(name))
+
+    def get(self, family, museum, function, *args):
+        """The stored cell if its inputs are unchanged, else function(*args),
+        which is stored for the next run"""
+        path = self.path(family, museum)
+        fingerprint = self.fingerprint(family, museum)
+        if self.reusable and os.path.isfile(path):
+            with open(path, 'rb') as infile:
+                stored = pickle.load(infile)
+            if stored['fingerprint'] == fingerprint:
+                return stored['value']
+        value = function(*args)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = "{}.{}.tmp".format(path, os.getpid())
+        with open(temp, 'wb') as outfile:
+            pickle.dump({'fingerprint': fingerprint, 'value': value}, outfile)
+        os.replace(temp, path)
+        return value
+
+    def save(self):
+        """Record the museum versions and hashes; call once the run finishes"""
+        if not os.path.isdir(self.root):
+            os.makedirs(self.root)
+        temp = "{}.tmp".format(self.state_path)
+        with open(temp, 'w') as outfile:
+            json.dump({'reference': self.reference, 'museums': self.museums}, outfile)
+        os.replace(temp, self.state_path)
+
+    def summary(self):
+        return "Incremental: scanned {} of {} museums; {} (family, museum) cells changed".format(
+            len(self.scanned), len(self.museums), self.changed
+        )
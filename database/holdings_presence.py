@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+(c) 2026 Brant Faircloth || http://faircloth-lab.org/
+All rights reserved.
+
+This code is distributed under a 3-clause BSD license. Please see
+LICENSE.txt for more information.
+
+Created on Oct 18, 2026.
+
+Maintain holdings_presence, a materialized table with one row per reference
+species held by a source (museum view), with the number of direct records
+and whether the species is held directly and/or via an alternate taxonomy.
+Species a source does not hold have no row.  Each source is fingerprinted
+by the table versions result_cache.py reads, and only sources whose data
+(or the species/taxonomies tables) changed, or that cannot be versioned,
+are rebuilt on refresh.
+
+The holdings reports read from this table with --presence-table.
+"""
+
+import argparse
+
+import pandas as pd
+from sqlalchemy import text
+
+import access
+import queries
+import result_cache
+
+
+SOURCES = (
+    'v_amnh', 'v_lsumns', 'v_ku', 'v_fmnh', 'v_usnm', 'v_uwbm', 'v_ala', 'v_vertnet',
+    'v_lsumns_spec', 'v_fmnh_spec', 'v_usnm_spec', 'v_uwbm_spec'
+)
+
+TAXONOMY_IDS = (1, 2, 3, 4, 5, 6, 7)
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description="""Refresh the holdings_presence table for changed sources""",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        '--sources',
+        nargs='+',
+        choices=SOURCES,
+        default=list(SOURCES),
+        help="""The museum views to maintain."""
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        default=False,
+        help="""Rebuild every source, even if unchanged."""
+    )
+    access.add_access_arguments(parser)
+    return parser.parse_args()
+
+
+def create_presence_tables(connection):
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS holdings_presence (
+            source text NOT NULL,
+            ordr text,
+            family text,
+            genus text NOT NULL,
+            species text NOT NULL,
+            records integer NOT NULL,
+            direct boolean NOT NULL,
+            via_taxonomy boolean NOT NULL,
+            PRIMARY KEY (source, genus, species)
+        );
+        """))
+    connection.execute(text("""
+        CREATE INDEX IF NOT EXISTS holdings_presence_source_family_idx
+            ON holdings_presence (source, family);
+        """))
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS holdings_presence_sources (
+            source text PRIMARY KEY,
+            fingerprint text NOT NULL,
+            refreshed timestamp NOT NULL DEFAULT now()
+        );
+        """))
+
+
+def get_source_fingerprint(versions, source):
+    """A source must be rebuilt when it, species, or taxonomies change; None
+    if any of them cannot be versioned"""
+    parts = [versions.get(table) for table in (source, 'species', 'taxonomies')]
+    if None in parts:
+        return None
+    return "||".join(parts)
+
+
+def get_stored_fingerprints(connection):
+    df = pd.read_sql_query("""
+        SELECT
+            source, fingerprint
+        FROM
+            holdings_presence_sources;
+        """, con=connection)
+    return dict(zip(df['source'], df['fingerprint']))
+
+
+def rebuild_source(connection, source, fingerprint):
+    if source not in queries.VIEWS:
+        raise ValueError("{} is not a known view".format(source))
+    connection.execute(text("DELETE FROM holdings_presence WHERE source = :source;"), {'source': source})
+    connection.execute(text("""
+        INSERT INTO holdings_presence
+            (source, ordr, family, genus, species, records, direct, via_taxonomy)
+        SELECT
+            :source,
+            species.ordr,
+            species.family,
+            species.genus,
+            species.species,
+            coalesce(direct.records, 0),
+            direct.records IS NOT NULL,
+            via.genus IS NOT NULL
+        FROM
+            species
+            LEFT JOIN (
+                SELECT
+                    {0}.genus, {0}.species, count(*) AS records
+                FROM
+                    {0}
+                GROUP BY
+                    {0}.genus, {0}.species
+            ) direct ON species.genus = direct.genus AND species.species = direct.species
+            LEFT JOIN (
+                SELECT DISTINCT
+                    taxonomies.genus, taxonomies.species
+                FROM
+                    taxonomies,
+                    {0}
+                WHERE
+                    taxonomies.taxonomy_id IN ({1})
+                    AND (taxonomies.genus != taxonomies.alt_genus OR taxonomies.species != taxonomies.alt_species)
+                    AND {0}.genus = taxonomies.alt_genus
+                    AND {0}.species = taxonomies.alt_species
+            ) via ON species.genus = via.genus AND species.species = via.species
+        WHERE
+            direct.records IS NOT NULL OR via.genus IS NOT NULL;
+        """.format(source, ",".join([str(i) for i in TAXONOMY_IDS]))), {'source': source})
+    connection.execute(text("""
+        INSERT INTO holdings_presence_sources (source, fingerprint, refreshed)
+        VALUES (:source, :fingerprint, now())
+        ON CONFLICT (source) DO UPDATE
+            SET fingerprint = excluded.fingerprint, refreshed = excluded.refreshed;
+        """), {'source': source, 'fingerprint': fingerprint or 'unversioned'})
+
+
+def refresh_presence(engine, sources=SOURCES, force=False):
+    """Rebuild holdings_presence rows for sources whose fingerprint changed
+    and return the list of sources rebuilt"""
+    with engine.begin() as connection:
+        create_presence_tables(connection)
+    for source in sources:
+        if source not in queries.VIEWS:
+            raise ValueError("{} is not a known view".format(source))
+    with engine.connect() as connection:
+        versions = result_cache.get_table_versions(connection)
+        stored = get_stored_fingerprints(connection)
+    fingerprints = {source: get_source_fingerprint(versions, source) for source in sources}
+    refreshed = []
+    for source in sources:
+        fingerprint = fingerprints[source]
+        if not force and fingerprint is not None and stored.get(source) == fingerprint:
+            continue
+        # each source is swapped in its own transaction
+        with engine.begin() as connection:
+            rebuild_source(connection, source, fingerprints[source])
+        refreshed.append(source)
+    return refreshed
+
+
+def get_holdings_family_counts(connection, museum):
+    df = queries.read(connection, 'presence_family_counts', museum)
+    return df
+
+
+def get_holdings_genera_counts(connection, museum, family):
+    df = queries.read(connection, 'presence_genera_counts', museum, family=family)
+    return df
+
+
+def get_holdings_species_counts(connection, museum, family):
+    df = queries.read(connection, 'presence_species_counts', museum, family=family)
+    return df
+
+
+def get_holdings_presence_chunks(connection, museums):
+    """Same shape and chunks as the across-taxonomies single-pass presence
+    query"""
+    return access.read_sql_chunks(connection, '''
+        SELECT
+            holdings_presence.source AS museum,
+            holdings_presence.family,
+            holdings_presence.genus,
+            holdings_presence.species
+        FROM
+            holdings_presence
+        WHERE
+            holdings_presence.source IN ({0});
+        '''.format(", ".join(["'{}'".format(museum) for museum in museums])))
+
+
+def main():
+    args = get_args()
+    engine = access.get_engine_from_args(args)
+    refreshed = refresh_presence(engine, args.sources, args.force)
+    if refreshed:
+        print("Refreshed: {}".format(", ".join(refreshed)))
+    else:
+        print("All sources up to date.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+(c) 2026 Brant Faircloth || http://faircloth-lab.org/
+All rights reserved.
+
+This code is distributed under a 3-clause BSD license. Please see
+LICENSE.txt for more information.
+
+Created on Oct 18, 2026.
+
+Holdings counts for every museum at order, family, genus and species level
+from a single GROUPING SETS aggregation.  The reference taxonomy is rolled up
+in the same pass as one more source (REFERENCE), so the family count, by
+family (genus) and by species reports are all projections of one result:
+
+    level    taxa                               records
+    ordr     distinct species held in order     records in order
+    family   distinct species held in family    records in family
+    genus    distinct species held in genus     records in genus
+    species  1                                  records of the species
+
+With presence_table=True, holdings come from the materialized
+holdings_presence table instead of the museum views.
+"""
+
+import access
+import queries
+
+
+REFERENCE = 'species'
+
+LEVELS = ('ordr', 'family', 'genus', 'species')
+
+# GROUPING(ordr, family, genus, species) -> level
+_GROUPING_LEVELS = {7: 'ordr', 3: 'family', 1: 'genus', 0: 'species'}
+
+
+def get_rollup_sql(museums, presence_table=False):
+    for museum in museums:
+        if museum not in queries.VIEWS:
+            raise ValueError("{} is not a known view".format(museum))
+    if presence_table:
+        holdings = """
+            SELECT
+                holdings_presence.source AS museum, holdings_presence.genus, holdings_presence.species, holdings_presence.records
+            FROM
+                holdings_presence
+            WHERE
+                holdings_presence.direct
+                AND holdings_presence.source IN ({})
+            """.format(", ".join(["'{}'".format(museum) for museum in museums]))
+    else:
+        holdings = "\n            UNION ALL\n".join(["""
+            SELECT
+                '{0}' AS museum, {0}.genus, {0}.species, count(*) AS records
+            FROM
+                {0}
+            GROUP BY
+                {0}.genus, {0}.species""".format(museum) for museum in museums])
+    return """
+        WITH holdings AS (
+            {0}
+            UNION ALL
+            SELECT
+                '{1}' AS museum, species.genus, species.species, 0 AS records
+            FROM
+                species
+        )
+        SELECT
+            GROUPING(species.ordr, species.family, species.genus, species.species) AS grouping,
+            holdings.museum,
+            species.ordr,
+            species.family,
+            species.genus,
+            species.species,
+            count(DISTINCT (species.genus, species.species)) AS taxa,
+            sum(holdings.records) AS records
+        FROM
+            species
+            JOIN holdings ON species.genus = holdings.genus AND species.species = holdings.species
+        GROUP BY
+            holdings.museum,
+            GROUPING SETS (
+                (species.ordr),
+                (species.ordr, species.family),
+                (species.ordr, species.family, species.genus),
+                (species.ordr, species.family, species.genus, species.species)
+            );
+        """.format(holdings, REFERENCE)
+
+
+def get_holdings_rollup(connection, museums, presence_table=False):
+    """Return the rollup in long form: level, museum, ordr, family, genus,
+    species, taxa, records"""
+    df = access.read_sql_streamed(connection, get_rollup_sql(museums, presence_table))
+    df.insert(0, 'level', df.pop('grouping').map(_GROUPING_LEVELS))
+    return df
+
+
+def _project(rollup, level, museums, value, reference=True):
+    """One row per key at level: the reference count (as 'count') and one
+    column per museum, in museum order"""
+    keys = list(LEVELS[:LEVELS.index(level) + 1])
+    df = rollup[rollup['level'] == level]
+    table = df.pivot(index=keys, columns='museum', values=value)
+    table = table.reindex(columns=[REFERENCE] + list(museums))
+    table = table[table[REFERENCE].notna()]
+    if reference:
+        table = table.rename(columns={REFERENCE: 'count'})
+        table['count'] = table['count'].astype(int)
+    else:
+        table = table.drop(columns=REFERENCE)
+    table.columns.name = None
+    return table.reset_index().sort_values(keys).reset_index(drop=True)
+
+
+def _by_family(table, columns):
+    return {family: group[columns].reset_index(drop=True) for family, group in table.groupby('family', sort=True)}
+
+
+def family_counts(rollup, museums):
+    """ordr, family, count, <museum>... (distinct species held per family)"""
+    return _project(rollup, 'family', museums, 'taxa')
+
+
+def genus_counts(rollup, museums):
+    """{family: genus, count, <museum>...} (distinct species held per genus)"""
+    table = _project(rollup, 'genus', museums, 'taxa')
+    return _by_family(table, ['genus', 'count'] + list(museums))
+
+
+def species_counts(rollup, museums):
+    """{family: genus, species, <museum>...} (records per species); a museum
+    with nothing in a family gets zeros, as the per-family reports did"""
+    table = _project(rollup, 'species', museums, 'records', reference=False)
+    families = _by_family(table, ['genus', 'species'] + list(museums))
+    for family, df in families.items():
+        for museum in museums:
+            if df[museum].isnull().all():
+                df[museum] = 0
+    return families
@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+(c) 2026 Brant Faircloth || http://faircloth-lab.org/
+All rights reserved.
+
+This code is distributed under a 3-clause BSD license. Please see
+LICENSE.txt for more information.
+
+Created on Oct 18, 2026.
+
+Build a synthetic openwings database for development and benchmarking:
+family, species, taxonomies and tissues tables plus every museum view the
+scripts read, with the columns they select.  Size is controlled by the
+number of reference species, alternate names per species and specimens per
+museum.  Museum records are filed under alternate names part of the time,
+so the across-taxonomies paths have work to do.  Input files for the tissue
+and specific-species scripts are written alongside.
+
+This DROPs and recreates the tables it owns; it refuses to touch a database
+that already has a species table unless --replace is given.
+"""
+
+import os
+import io
+import argparse
+
+import numpy
+import pandas as pd
+from sqlalchemy import text
+
+import access
+from queries import TISSUE_COLUMNS
+
+
+# every museum view read by the scripts; each is a slice of `specimens`
+SOURCES = (
+    'v_amnh', 'v_lsumns', 'v_ku', 'v_fmnh', 'v_usnm', 'v_uwbm', 'v_ala', 'v_vertnet',
+    'v_lsumns_spec', 'v_fmnh_spec', 'v_usnm_spec', 'v_uwbm_spec'
+)
+
+# sources whose records also go in the tissues table
+TISSUE_SOURCES = ('v_amnh', 'v_lsumns', 'v_ku', 'v_fmnh', 'v_usnm', 'v_uwbm')
+
+TAXONOMY_IDS = (1, 2, 3, 4, 5, 6, 7)
+
+SPECIES_PER_GENUS = 5
+GENERA_PER_FAMILY = 10
+FAMILIES_PER_ORDER = 10
+
+SYLLABLES = ('ba', 'ce', 'di', 'fo', 'gu', 'ha', 'ke', 'li', 'mo', 'nu', 'pa', 're', 'si', 'to', 'vu', 'za')
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description="""Build a synthetic openwings database and matching input files""",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        '--species',
+        type=int,
+        default=1000,
+        help="""The number of reference species."""
+    )
+    parser.add_argument(
+        '--synonyms',
+        type=int,
+        default=2,
+        help="""The number of alternate names per species in taxonomies."""
+    )
+    parser.add_argument(
+        '--specimens',
+        type=int,
+        default=5000,
+        help="""The number of specimen records per museum view."""
+    )
+    parser.add_argument(
+        '--sheet-taxa',
+        type=int,
+        default=500,
+        help="""The number of taxa in the generated tissue spreadsheet."""
+    )
+    parser.add_argument(
+        '--inputs',
+        default='.',
+        help="""The directory in which to write the input spreadsheets and config."""
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=1,
+        help="""The random seed."""
+    )
+    parser.add_argument(
+        '--replace',
+        action='store_true',
+        default=False,
+        help="""Drop and recreate the tables even if a species table already exists."""
+    )
+    access.add_access_arguments(parser)
+    return parser.parse_args()
+
+
+def latin(number, suffix):
+    """A pronounceable, unique name for number"""
+    word = ''
+    while True:
+        number, digit = divmod(number, len(SYLLABLES))
+        word = SYLLABLES[digit] + word
+        if number == 0:
+            break
+    return word + suffix
+
+
+def make_reference(species):
+    """Return the species frame (ordr, family, genus, species, ...)"""
+    index = numpy.arange(species)
+    genera = index // SPECIES_PER_GENUS
+    families = genera // GENERA_PER_FAMILY
+    orders = families // FAMILIES_PER_ORDER
+    return pd.DataFrame({
+        'ordr': [latin(i, 'iformes').title() for i in orders],
+        'family': [latin(i, 'idae').title() for i in families],
+        'genus': [latin(i, 'us').title() for i in genera],
+        'species': [latin(i, 'a') for i in index],
+        'authority': ['Synthetic {}'.format(1758 + i % 260) for i in index],
+        'common': ['Synthetic bird {}'.format(i) for i in index],
+        'breeding': 'NA',
+        'extinct': False
+    })
+
+
+def make_taxonomies(reference, synonyms, random):
+    """Alternate names: half move genus, half change the epithet"""
+    rows = []
+    genera = reference['genus'].unique()
+    for genus, species in zip(reference['genus'], reference['species']):
+        for i in range(synonyms):
+            if random.random() < 0.5:
+                alt_genus, alt_species = genera[random.randint(len(genera))], species
+            else:
+                alt_genus, alt_species = genus, "{}{}".format(species, SYLLABLES[i % len(SYLLABLES)])
+            rows.append((int(random.choice(TAXONOMY_IDS)), genus, species, alt_genus, alt_species))
+    return pd.DataFrame(rows, columns=['taxonomy_id', 'genus', 'species', 'alt_genus', 'alt_species'])
+
+
+def make_specimens(reference, taxonomies, source, count, random):
+    """Records for one museum view; most species rare, a few common"""
+    weights = 1.0 / numpy.arange(1, len(reference) + 1)
+    weights = random.permutation(weights / weights.sum())
+    picks = random.choice(len(reference), size=count, p=weights)
+    records = reference.iloc[picks][['ordr', 'family', 'genus', 'species']].reset_index(drop=True)
+    # file a quarter of the records under an alternate name, when there is one
+    if len(taxonomies) > 0:
+        alternate = random.random(count) < 0.25
+        alt = taxonomies.iloc[random.randint(len(taxonomies), size=alternate.sum())]
+        records.loc[alternate, 'genus'] = alt['alt_genus'].values
+        records.loc[alternate, 'species'] = alt['alt_species'].values
+    records['source'] = source
+    records['icode'] = source[2:].split('_')[0].upper()
+    records['year'] = random.randint(1880, 2021, size=count)
+    records['catalognumber'] = ["{}-{}".format(records['icode'][0], i) for i in range(count)]
+    records['sex'] = random.choice(['female', 'male', 'unknown'], size=count)
+    records['subspecies'] = ''
+    records['preparations'] = 'tissue'
+    records['continent'] = random.choice(['North America', 'South America', 'Africa', 'Asia', 'Oceania'], size=count)
+    records['country'] = 'Synthetic'
+    records['state'] = ''
+    records['county'] = ''
+    records['island'] = ''
+    records['locality'] = 'Synthetic locality'
+    records['decimallatitude'] = random.uniform(-60, 70, size=count).round(4)
+    records['decimallongitude'] = random.uniform(-180, 180, size=count).round(4)
+    records['remarks'] = ''
+    records['prep'] = 'tissue'
+    records['rank'] = random.randint(1, 6, size=count)
+    records['b_num'] = pd.array(numpy.where(random.random(count) < 0.7, numpy.arange(count), numpy.nan), dtype='Int64')
+    return records[['source'] + list(TISSUE_COLUMNS) + ['b_num']]
+
+
+def copy_frame(cursor, table, df):
+    """COPY a DataFrame into table"""
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cursor.copy_expert("COPY {0} ({1}) FROM STDIN WITH (FORMAT csv)".format(table, ", ".join(df.columns)), buffer)
+
+
+def create_schema(connection):
+    # derived state that no longer matches the new tables
+    connection.execute(text("DROP TABLE IF EXISTS holdings_presence, holdings_presence_sources, schema_migrations;"))
+    for source in SOURCES + ('v_lsumns_update',):
+        connection.execute(text("DROP VIEW IF EXISTS {} CASCADE;".format(source)))
+    connection.execute(text("DROP TABLE IF EXISTS family, species, taxonomies, tissues, specimens CASCADE;"))
+    connection.execute(text("CREATE TABLE family (name text PRIMARY KEY);"))
+    connection.execute(text("""
+        CREATE TABLE species (
+            ordr text, family text, genus text, species text, authority text,
+            common text, breeding text, extinct boolean
+        );
+        """))
+    connection.execute(text("""
+        CREATE TABLE taxonomies (
+            taxonomy_id integer, genus text, species text, alt_genus text, alt_species text
+        );
+        """))
+    columns = """
+        icode text, year integer, catalognumber text, sex text, ordr text, family text,
+        genus text, species text, subspecies text, preparations text, continent text,
+        country text, state text, county text, island text, locality text,
+        decimallatitude double precision, decimallongitude double precision,
+        remarks text, prep text, rank integer
+        """
+    connection.execute(text("CREATE TABLE specimens (source text, {}, b_num integer);".format(columns)))
+    connection.execute(text("CREATE TABLE tissues ({});".format(columns)))
+
+
+def create_views(connection):
+    connection.execute(text("CREATE INDEX specimens_source_idx ON specimens (source);"))
+    for source in SOURCES:
+        connection.execute(text("""
+            CREATE VIEW {0} AS
+            SELECT {1} FROM specimens WHERE source = '{0}';
+            """.format(source, ", ".join(TISSUE_COLUMNS))))
+    connection.execute(text("""
+        CREATE VIEW v_lsumns_update AS
+        SELECT {0}, b_num FROM specimens WHERE source = 'v_lsumns';
+        """.format(", ".join(TISSUE_COLUMNS))))
+    connection.execute(text("""
+        INSERT INTO tissues SELECT {0} FROM specimens WHERE source IN ({1});
+        """.format(", ".join(TISSUE_COLUMNS), ", ".join(["'{}'".format(source) for source in TISSUE_SOURCES]))))
+
+
+def has_species_table(connection):
+    return connection.execute(text("SELECT to_regclass('public.species') IS NOT NULL;")).scalar()
+
+
+def generate(engine, species=1000, synonyms=2, specimens=5000, seed=1, replace=False):
+    """Build the synthetic database and return the reference species frame"""
+    random = numpy.random.RandomState(seed)
+    with engine.connect() as connection:
+        if has_species_table(connection) and not replace:
+            raise ValueError("This database already has a species table; pass --replace to overwrite it")
+    reference = make_reference(species)
+    taxonomies = make_taxonomies(reference, synonyms, random)
+    with engine.begin() as connection:
+        create_schema(connection)
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        copy_frame(cursor, 'family', pd.DataFrame({'name': reference['family'].unique()}))
+        copy_frame(cursor, 'species', reference)
+        copy_frame(cursor, 'taxonomies', taxonomies)
+        for source in SOURCES:
+            records = make_specimens(reference, taxonomies, source, specimens, random)
+            copy_frame(cursor, 'specimens', records)
+        raw.commit()
+    finally:
+        raw.close()
+    with engine.begin() as connection:
+        create_views(connection)
+        connection.execute(text("ANALYZE;"))
+    return reference
+
+
+def write_inputs(directory, reference, sheet_taxa=500, seed=1):
+    """Write species.csv/.xlsx (tissue scripts) and species.conf (specific species)"""
+    random = numpy.random.RandomState(seed)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    sample = reference.iloc[random.permutation(len(reference))[:sheet_taxa]]
+    sheet = pd.DataFrame({
+        'Order': sample['ordr'].values,
+        'Family': sample['family'].values,
+        'Genus species': (sample['genus'] + ' ' + sample['species']).values,
+        'Status': None
+    })
+    # a few names outside the reference taxonomy, and a few already done
+    unknown = pd.DataFrame({
+        'Order': 'Unknowniformes',
+        'Family': 'Unknownidae',
+        'Genus species': ['Unknownus {}'.format(latin(i, 'a')) for i in range(max(1, sheet_taxa // 50))],
+        'Status': None
+    })
+    sheet = pd.concat([sheet, unknown], ignore_index=True)
+    sheet.loc[sheet.index[::20], 'Status'] = 'done'
+    sheet.to_csv(os.path.join(directory, 'species.csv'), index=False)
+    sheet.to_excel(os.path.join(directory, 'species.xlsx'), index=False)
+    with open(os.path.join(directory, 'species.conf'), 'w') as outfile:
+        outfile.write("[species]\n")
+        for name in sheet['Genus species'][:50]:
+            outfile.write("{}\n".format(name))
+    return sheet
+
+
+def main():
+    args = get_args()
+    engine = access.get_engine_from_args(args)
+    reference = generate(engine, args.species, args.synonyms, args.specimens, args.seed, args.replace)
+    write_inputs(args.inputs, reference, args.sheet_taxa, args.seed)
+    print("Created {} species in {} families, {} alternate names, {} records per museum.".format(
+        len(reference), reference['family'].nunique(), len(reference) * args.synonyms, args.specimens
+    ))
+
+
+if __name__ == '__main__':
+    main()
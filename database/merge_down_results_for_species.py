@@ -10,15 +10,25 @@ This code is distributed under a 3-clause BSD license. Please see
 LICENSE.txt for more information.
 
 Created on 13 July 2018 10:46 CDT (-0500)
+
+With --workers > 1, family workbooks are read, filtered and written in a
+process pool while the combined workbook is streamed from the main process.
+When the holdings run left a Parquet (or Feather) copy next to a workbook,
+that copy is read instead of parsing the xlsx.
 """
 
 import os
+import sys
 import glob
 import shutil
 import argparse
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
 
 import pandas as pd
 
+from report_writer import StreamingWorkbook
+
 import pdb
 
 class FullPaths(argparse.Action):
@@ -71,34 +81,69 @@ def get_args():
         action=CreateDir,
         help="""The directory in which to write the results."""
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help="""The number of processes used to read and write family workbooks."""
+    )
+    parser.add_argument(
+        '--xlsx-only',
+        action='store_true',
+        default=False,
+        help="""Ignore Parquet/Feather intermediates and always parse the xlsx files."""
+    )
     return parser.parse_args()
 
+
+def read_family_holdings(path, intermediates=True):
+    """Read a family workbook, preferring a columnar copy with the same stem"""
+    stem = os.path.splitext(path)[0]
+    if intermediates:
+        for suffix, reader in (('.parquet', pd.read_parquet), ('.feather', pd.read_feather)):
+            if os.path.isfile(stem + suffix):
+                df = reader(stem + suffix)
+                # match read_excel, which returns the written index as the first column
+                df.insert(0, 'Unnamed: 0', range(len(df)))
+                return df
+    return pd.read_excel(path)
+
+
+def write_holdings(path, df):
+    """Write df to a 'Totals by Museum' sheet, keeping its index as to_excel did"""
+    with StreamingWorkbook(path) as workbook:
+        workbook.add_sheet('Totals by Museum', index=False).write(df.reset_index().rename(columns={'index': ''}))
+
+
+def merge_down_family(path, output, intermediates=True):
+    name = os.path.basename(path)
+    sname = os.path.splitext(name)
+    order = sname[0].split("_")[-1]
+    print("Working on {}".format(name))
+    new_name = "{}.no-tissues{}".format(sname[0], sname[1])
+    excel = read_family_holdings(path, intermediates)
+    no_tissues = excel[excel.all_collab_museums == 0].copy()
+    write_holdings(os.path.join(output, new_name), no_tissues)
+    no_tissues.insert(0, 'family', order)
+    return no_tissues
+
+
 def main():
     args = get_args()
-    files = glob.glob(os.path.join(args.species_files, "*.xlsx"))
-    frames = []
-    for file in files:
-        name = os.path.basename(file)
-        sname = os.path.splitext(name)
-        order = sname[0].split("_")[-1]
-        print("Working on {}".format(name))
-        new_name = "{}.no-tissues{}".format(sname[0], sname[1])
-        excel = pd.read_excel(file)
-        no_tissues = excel[excel.all_collab_museums == 0]
-        out_path = os.path.join(args.output, new_name)
-        writer = pd.ExcelWriter(out_path)
-        no_tissues.to_excel(writer,'Totals by Museum')
-        no_tissues.insert(0, 'family', order)
-        #pdb.set_trace()
-        frames.append(no_tissues)
-        writer.save()
-    # now, lets write one file that contains all of the data
-    concatenated = pd.concat(frames)
+    files = sorted(glob.glob(os.path.join(args.species_files, "*.xlsx")))
+    arguments = (files, repeat(args.output), repeat(not args.xlsx_only))
+    # now, lets write one file that contains all of the data, as families finish
     out_path2 = os.path.join(args.output, "ALL-TAXA-MISSING-TISSUES.xlsx")
-    writer = pd.ExcelWriter(out_path2)
-    concatenated.to_excel(writer,'Totals by Museum')
-    writer.save()
-    #pdb.set_trace()
+    with StreamingWorkbook(out_path2) as workbook:
+        sheet = workbook.add_sheet('Totals by Museum', index=False)
+        if args.workers > 1:
+            with ProcessPoolExecutor(max_workers=args.workers) as executor:
+                # map keeps file order, so the combined output is deterministic
+                for no_tissues in executor.map(merge_down_family, *arguments):
+                    sheet.write(no_tissues.reset_index().rename(columns={'index': ''}))
+        else:
+            for no_tissues in map(merge_down_family, *arguments):
+                sheet.write(no_tissues.reset_index().rename(columns={'index': ''}))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+(c) 2026 Brant Faircloth || http://faircloth-lab.org/
+All rights reserved.
+
+This code is distributed under a 3-clause BSD license. Please see
+LICENSE.txt for more information.
+
+Created on Oct 18, 2026.
+
+Versioned index migrations matched to the access paths of the scripts:
+
+    1  (genus, species) equality on the tables under every museum view
+    2  (genus, species) + ORDER BY rank, sex, year DESC LIMIT n on tissues,
+       v_vertnet, v_ala and v_lsumns_update
+    3  taxonomies by (alt_genus, alt_species), covering the reference name,
+       and by (genus, species, taxonomy_id)
+    4  species by (genus, species) and by family
+
+Views are resolved to their base tables when a migration runs.  Applied
+versions are recorded in schema_migrations; --concurrently builds indexes
+with CREATE INDEX CONCURRENTLY (outside a transaction), replacing any
+invalid index a failed concurrent build left behind.  --verify checks that
+every index exists and is valid.
+
+Compare before/after with benchmark.py --migrate.
+"""
+
+import sys
+import argparse
+
+import pandas as pd
+from sqlalchemy import text
+
+import access
+from result_cache import get_view_tables
+
+
+HOLDINGS_VIEWS = (
+    'v_amnh', 'v_lsumns', 'v_ku', 'v_fmnh', 'v_usnm', 'v_uwbm', 'v_ala', 'v_vertnet',
+    'v_lsumns_spec', 'v_fmnh_spec', 'v_usnm_spec', 'v_uwbm_spec'
+)
+
+TISSUE_RELATIONS = ('tissues', 'v_vertnet', 'v_ala', 'v_lsumns_update')
+
+
+class IndexSpec(object):
+    """An index on columns (optionally INCLUDE-ing more) on the tables
+    underneath each of relations"""
+    def __init__(self, suffix, columns, relations, include=()):
+        self.suffix = suffix
+        self.columns = tuple(columns)
+        self.relations = tuple(relations)
+        self.include = tuple(include)
+
+    def name(self, table):
+        # postgres truncates identifiers at 63 characters
+        return "{}_{}_idx".format(table, self.suffix)[:63]
+
+    def required_columns(self):
+        return set([column.split()[0] for column in self.columns + self.include])
+
+    def create_sql(self, table, concurrently=False):
+        sql = "CREATE INDEX {0}IF NOT EXISTS {1} ON {2} ({3})".format(
+            "CONCURRENTLY " if concurrently else "",
+            self.name(table),
+            table,
+            ", ".join(self.columns)
+        )
+        if self.include:
+            sql += " INCLUDE ({})".format(", ".join(self.include))
+        return sql + ";"
+
+
+MIGRATIONS = (
+    (1, 'museum views: (genus, species)', (
+        IndexSpec('genus_species', ('genus', 'species'), HOLDINGS_VIEWS),
+    )),
+    (2, 'tissue sources: (genus, species) ordered by rank, sex, year DESC', (
+        IndexSpec('genus_species_rank', ('genus', 'species', 'rank', 'sex', 'year DESC'), TISSUE_RELATIONS),
+    )),
+    (3, 'taxonomies: alternate names and (genus, species, taxonomy_id)', (
+        IndexSpec('alt_names', ('alt_genus', 'alt_species'), ('taxonomies',), include=('genus', 'species', 'taxonomy_id')),
+        IndexSpec('names_taxonomy', ('genus', 'species', 'taxonomy_id'), ('taxonomies',)),
+    )),
+    (4, 'species: (genus, species) and family', (
+        IndexSpec('genus_species', ('genus', 'species'), ('species',), include=('family',)),
+        IndexSpec('family', ('family', 'genus', 'species'), ('species',)),
+    )),
+)
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description="""Create and verify the indexes used by the database scripts""",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        '--target',
+        type=int,
+        default=None,
+        help="""Apply migrations up to and including this version (default: all)."""
+    )
+    parser.add_argument(
+        '--concurrently',
+        action='store_true',
+        default=False,
+        help="""Build indexes with CREATE INDEX CONCURRENTLY so tables stay writable."""
+    )
+    parser.add_argument(
+        '--verify',
+        action='store_true',
+        default=False,
+        help="""Only check that the indexes of applied migrations exist and are valid."""
+    )
+    access.add_access_arguments(parser)
+    return parser.parse_args()
+
+
+def create_migrations_table(connection):
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version integer PRIMARY KEY,
+            description text NOT NULL,
+            applied timestamp NOT NULL DEFAULT now()
+        );
+        """))
+
+
+def get_applied_versions(connection):
+    df = pd.read_sql_query("SELECT version FROM schema_migrations;", con=connection)
+    return set(df['version'])
+
+
+def get_table_columns(connection):
+    df = pd.read_sql_query("""
+        SELECT
+            table_name, column_name
+        FROM
+            information_schema.columns
+        WHERE
+            table_schema = current_schema();
+        """, con=connection)
+    columns = {}
+    for table, column in df.itertuples(index=False, name=None):
+        columns.setdefault(table, set()).add(column)
+    return columns
+
+
+def get_index_states(connection):
+    """Return {index name: valid} for indexes in the current schema"""
+    df = pd.read_sql_query("""
+        SELECT
+            c.relname, i.indisvalid
+        FROM
+            pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE
+            n.nspname = current_schema();
+        """, con=connection)
+    return dict(zip(df['relname'], df['indisvalid']))
+
+
+def plan_indexes(connection, specs):
+    """Return [(spec, table)] for every base table the specs apply to, skipping
+    (and reporting) tables that lack the columns"""
+    views = get_view_tables(connection)
+    columns = get_table_columns(connection)
+    planned = []
+    for spec in specs:
+        for relation in spec.relations:
+            for table in sorted(views.get(relation, set([relation]))):
+                if table not in columns:
+                    print("\tskipping {} ({}): no such table".format(spec.name(table), relation))
+                elif not spec.required_columns() <= columns[table]:
+                    print("\tskipping {} ({}): missing {}".format(
+                        spec.name(table), relation, ", ".join(sorted(spec.required_columns() - columns[table]))
+                    ))
+                elif (spec, table) not in planned:
+                    planned.append((spec, table))
+    return planned
+
+
+def apply_migration(engine, version, description, specs, concurrently=False):
+    print("Migration {}: {}".format(version, description))
+    with engine.connect() as connection:
+        planned = plan_indexes(connection, specs)
+        states = get_index_states(connection)
+    statements = []
+    for spec, table in planned:
+        if states.get(spec.name(table)) is False:
+            # left behind by a failed concurrent build; IF NOT EXISTS would keep it
+            statements.append("DROP INDEX {0}IF EXISTS {1};".format("CONCURRENTLY " if concurrently else "", spec.name(table)))
+        statements.append(spec.create_sql(table, concurrently))
+    tables = sorted(set([table for spec, table in planned]))
+    if concurrently:
+        with engine.execution_options(isolation_level='AUTOCOMMIT').connect() as connection:
+            for statement in statements:
+                print("\t{}".format(statement))
+                connection.execute(text(statement))
+    else:
+        with engine.begin() as connection:
+            for statement in statements:
+                print("\t{}".format(statement))
+                connection.execute(text(statement))
+    with engine.begin() as connection:
+        for table in tables:
+            connection.execute(text("ANALYZE {};".format(table)))
+        connection.execute(text("""
+            INSERT INTO schema_migrations (version, description) VALUES (:version, :description);
+            """), {'version': version, 'description': description})
+
+
+def migrate(engine, target=None, concurrently=False):
+    """Apply pending migrations in order; return the versions applied"""
+    with engine.begin() as connection:
+        create_migrations_table(connection)
+        applied = get_applied_versions(connection)
+    done = []
+    for version, description, specs in MIGRATIONS:
+        if version in applied or (target is not None and version > target):
+            continue
+        apply_migration(engine, version, description, specs, concurrently)
+        done.append(version)
+    return done
+
+
+def verify(engine):
+    """Print the state of each expected index; return the number of problems"""
+    problems = 0
+    with engine.begin() as connection:
+        create_migrations_table(connection)
+        applied = get_applied_versions(connection)
+    with engine.connect() as connection:
+        states = get_index_states(connection)
+        for version, description, specs in MIGRATIONS:
+            if version not in applied:
+                print("Migration {}: not applied".format(version))
+                continue
+            print("Migration {}: {}".format(version, description))
+            for spec, table in plan_indexes(connection, specs):
+                state = states.get(spec.name(table))
+                if state is None:
+                    label = 'MISSING'
+                elif not state:
+                    label = 'INVALID'
+                else:
+                    label = 'OK'
+                if label != 'OK':
+                    problems += 1
+                print("\t{:<8}{}".format(label, spec.name(table)))
+    return problems
+
+
+def main():
+    args = get_args()
+    engine = access.get_engine_from_args(args)
+    if args.verify:
+        sys.exit(1 if verify(engine) else 0)
+    done = migrate(engine, args.target, args.concurrently)
+    if done:
+        print("Applied: {}".format(", ".join([str(version) for version in done])))
+    else:
+        print("Schema up to date.")
+    sys.exit(1 if verify(engine) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+(c) 2026 Brant Faircloth || http://faircloth-lab.org/
+All rights reserved.
+
+This code is distributed under a 3-clause BSD license. Please see
+LICENSE.txt for more information.
+
+Created on Oct 18, 2026.
+
+Species x museum presence for the across-taxonomies reports, held as bits.
+Rows are integer species ids (positions in the reference frame, whose index
+labels the rows of frame() as the merges of the old reports did); each museum
+gets one uint8 whose bits are its sources: bit 0 for names filed under the
+reference taxonomy, bits 1-7 for taxonomies 1-7.  A species is present in a
+museum when any of its bits are set, so present_*, all_collab_museums and
+all_museums_totals are bitwise/boolean reductions over the array.  Names are
+only looked up when marking and DataFrames are only built by frame().
+"""
+
+import numpy
+import pandas as pd
+
+
+DIRECT = 0
+
+TAXONOMY_IDS = (1, 2, 3, 4, 5, 6, 7)
+
+# all_collab_museums covers the first six museums of a report
+COLLAB_MUSEUMS = 6
+
+
+class PresenceMatrix(object):
+    """Presence bits for the species in reference (genus, species, ...) across
+    museums"""
+    def __init__(self, reference, museums, bits=None):
+        self.reference = reference[['genus', 'species']]
+        self.museums = tuple(museums)
+        self.columns = {museum: i for i, museum in enumerate(self.museums)}
+        self._names = None
+        if bits is None:
+            bits = numpy.zeros((len(self.reference), len(self.museums)), dtype=numpy.uint8)
+        self.bits = bits
+
+    def __len__(self):
+        return len(self.reference)
+
+    def _lookup(self):
+        """(unique reference names, position in them of each reference row);
+        the reference may list a species more than once"""
+        if self._names is None:
+            codes, names = pd.MultiIndex.from_frame(self.reference).factorize()
+            self._names = (names, codes)
+        return self._names
+
+    def ids(self, names):
+        """Species ids of every reference row matching a (genus, species) row
+        of names; names not in the reference are dropped"""
+        if len(names) == 0:
+            return numpy.zeros(0, dtype=numpy.intp)
+        unique, codes = self._lookup()
+        found = unique.get_indexer(pd.MultiIndex.from_frame(names[['genus', 'species']]))
+        return numpy.flatnonzero(numpy.isin(codes, found[found >= 0]))
+
+    def mark(self, museum, names, source=DIRECT):
+        """Set the source bit (0 direct, 1-7 taxonomy) for names held by museum"""
+        self.bits[self.ids(names), self.columns[museum]] |= numpy.uint8(1 << source)
+
+    def take(self, ids):
+        """The matrix restricted to the species at ids, in that order"""
+        return PresenceMatrix(self.reference.iloc[ids], self.museums, self.bits[ids])
+
+    def split(self, families):
+        """Split by a family label per species into {family: PresenceMatrix}"""
+        groups = pd.Series(numpy.asarray(families)).groupby(numpy.asarray(families), sort=False).indices
+        return {family: self.take(ids) for family, ids in groups.items()}
+
+    def present(self):
+        """(species, museum) boolean array"""
+        return self.bits != 0
+
+    def held_by_any(self, museums):
+        """Species held by any of museums, as an OR across their source bits"""
+        columns = [self.columns[museum] for museum in museums]
+        if not columns:
+            return numpy.zeros(len(self), dtype=bool)
+        return numpy.bitwise_or.reduce(self.bits[:, columns], axis=1) != 0
+
+    def held_count(self, museums):
+        """Number of museums holding each species"""
+        columns = [self.columns[museum] for museum in museums]
+        return (self.bits[:, columns] != 0).sum(axis=1)
+
+    def frame(self):
+        """genus, species, present_<museum>..., all_museums_totals and
+        all_collab_museums (museum counts), as the 'Totals by Museum' sheet"""
+        df = self.reference.copy()
+        present = self.present()
+        for museum, column in self.columns.items():
+            df["present_{}".format(museum)] = present[:, column]
+        df["all_museums_totals"] = present.sum(axis=1)
+        df["all_collab_museums"] = present[:, :COLLAB_MUSEUMS].sum(axis=1)
+        return df
+
+    def summary_frame(self):
+        """genus, species, all_collab_museums, all_museums_totals as booleans"""
+        df = self.reference.copy()
+        df["all_collab_museums"] = self.held_by_any(self.museums[:COLLAB_MUSEUMS])
+        df["all_museums_totals"] = self.held_by_any(self.museums)
+        return df
@@ -0,0 +1,504 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+(c) 2026 Brant Faircloth || http://faircloth-lab.org/
+All rights reserved.
+
+This code is distributed under a 3-clause BSD license. Please see
+LICENSE.txt for more information.
+
+Created on Oct 18, 2026.
+
+Catalog of the parameterized queries used by the scripts in database/.
+Each query shape is instantiated once per view (view names cannot be bound,
+so they are checked against VIEWS) and PREPAREd once per pooled connection.
+Every later call is an EXECUTE that reuses the parsed statement and, once
+Postgres settles on a generic plan, the cached plan.  Names are always bound
+parameters, so apostrophes in taxon names are safe.  Streamed reads go over a
+server-side cursor, which cannot be declared FOR EXECUTE, so they run the
+plain statement with the same (typed) bound parameters instead.
+
+With --result-cache, results are also kept on disk (see result_cache.py) and
+repeated reads against unchanged tables skip the database entirely.
+
+Name columns come back as categoricals sharing one dictionary per column for
+the run (see categories.py); use queries.concat() to stack query results.
+"""
+
+import re
+import threading
+
+import pandas as pd
+from sqlalchemy import text
+
+import access
+import categories
+import result_cache
+
+
+VIEWS = (
+    'v_amnh', 'v_lsumns', 'v_ku', 'v_fmnh', 'v_usnm', 'v_uwbm', 'v_ala', 'v_vertnet',
+    'v_lsumns_spec', 'v_fmnh_spec', 'v_usnm_spec', 'v_uwbm_spec', 'v_lsumns_update', 'tissues'
+)
+
+TISSUE_COLUMNS = (
+    'icode', 'year', 'catalognumber', 'sex', 'ordr', 'family', 'genus', 'species',
+    'subspecies', 'preparations', 'continent', 'country', 'state', 'county', 'island',
+    'locality', 'decimallatitude', 'decimallongitude', 'remarks', 'prep', 'rank'
+)
+
+# shape: (sql, ((parameter, postgres type), ...)); {view} is filled per view
+SHAPES = {
+    'reference_species': ("""
+        SELECT
+            species.genus, species.species
+        FROM
+            species
+        WHERE
+            species.family = :family
+        """, (('family', 'text'),)),
+    'reference_species_by_name': ("""
+        SELECT
+            species.genus, species.species
+        FROM
+            species
+        WHERE
+            species.genus = :genus AND species.species = :species
+        """, (('genus', 'text'), ('species', 'text'))),
+    'reference_species_by_names': ("""
+        SELECT
+            species.genus, species.species
+        FROM
+            species
+        WHERE
+            (species.genus, species.species) IN (
+                SELECT names.genus, names.species FROM unnest(:genera, :epithets) AS names(genus, species)
+            )
+        """, (('genera', 'text[]'), ('epithets', 'text[]'))),
+    'reference_genera': ("""
+        SELECT
+            species.genus,
+            count(DISTINCT (species.genus, species.species))
+        FROM
+            species
+        WHERE
+            species.family = :family
+        GROUP BY
+            species.genus
+        """, (('family', 'text'),)),
+    'holdings_species': ("""
+        SELECT
+            species.genus,
+            species.species
+        FROM
+            {view},
+            species
+        WHERE
+            species.family = :family
+            AND species.genus = {view}.genus
+            AND species.species = {view}.species
+        GROUP BY
+            species.genus, species.species
+        """, (('family', 'text'),)),
+    'holdings_species_by_taxonomy': ("""
+        SELECT
+            species.genus,
+            species.species
+        FROM
+            {view},
+            species,
+            taxonomies
+        WHERE
+            species.family = :family
+            AND taxonomies.taxonomy_id = :taxonomy
+            AND species.genus = taxonomies.genus
+            AND species.species = taxonomies.species
+            AND (species.genus != taxonomies.alt_genus OR species.species != taxonomies.alt_species)
+            AND {view}.genus = taxonomies.alt_genus
+            AND {view}.species = taxonomies.alt_species
+        GROUP BY
+            species.genus, species.species
+        """, (('family', 'text'), ('taxonomy', 'integer'))),
+    'holdings_species_by_names': ("""
+        SELECT
+            names.genus,
+            names.species
+        FROM
+            {view},
+            unnest(:genera, :epithets) AS names(genus, species)
+        WHERE
+            names.genus = {view}.genus
+            AND names.species = {view}.species
+        GROUP BY
+            names.genus, names.species
+        """, (('genera', 'text[]'), ('epithets', 'text[]'))),
+    'holdings_species_by_names_by_taxonomy': ("""
+        SELECT
+            names.genus,
+            names.species
+        FROM
+            {view},
+            unnest(:genera, :epithets) AS names(genus, species),
+            taxonomies
+        WHERE
+            taxonomies.taxonomy_id = :taxonomy
+            AND names.genus = taxonomies.genus
+            AND names.species = taxonomies.species
+            AND (names.genus != taxonomies.alt_genus OR names.species != taxonomies.alt_species)
+            AND {view}.genus = taxonomies.alt_genus
+            AND {view}.species = taxonomies.alt_species
+        GROUP BY
+            names.genus, names.species
+        """, (('genera', 'text[]'), ('epithets', 'text[]'), ('taxonomy', 'integer'))),
+    'holdings_species_counts': ("""
+        SELECT
+            species.genus,
+            species.species,
+            count(*) as {view}
+        FROM
+            {view},
+            species
+        WHERE
+            species.family = :family
+            AND species.genus = {view}.genus
+            AND species.species = {view}.species
+        GROUP BY
+            species.genus, species.species
+        """, (('family', 'text'),)),
+    'holdings_genera_counts': ("""
+        SELECT
+            species.genus,
+            count(DISTINCT (species.genus, species.species)) as {view}
+        FROM
+            species,
+            {view}
+        WHERE
+            species.family = :family
+            AND species.genus = {view}.genus
+            AND species.species = {view}.species
+        GROUP BY
+            species.genus
+        """, (('family', 'text'),)),
+    'holdings_family_counts': ("""
+        SELECT
+            species.family,
+            count(DISTINCT (species.genus, species.species)) as {view}
+        FROM
+            species,
+            {view}
+        WHERE
+            species.genus = {view}.genus
+            AND species.species = {view}.species
+        GROUP BY
+            species.family
+        """, ()),
+    'lsu_tissue_records': ("""
+        SELECT
+            *
+        FROM
+            v_lsumns_update
+        WHERE
+            (genus, species) IN (
+                SELECT names.genus, names.species FROM unnest(:genera, :epithets) AS names(genus, species)
+            )
+            AND b_num IS NOT NULL
+        ORDER BY
+            sex ASC, year DESC
+        LIMIT 15
+        """, (('genera', 'text[]'), ('epithets', 'text[]'))),
+    'other_tissue_records': ("""
+        SELECT
+            *
+        FROM
+            tissues
+        WHERE
+            (genus, species) IN (
+                SELECT names.genus, names.species FROM unnest(:genera, :epithets) AS names(genus, species)
+            )
+            AND icode != 'LSUMNS'
+        ORDER BY
+            sex ASC, year DESC
+        LIMIT 15
+        """, (('genera', 'text[]'), ('epithets', 'text[]'))),
+    'all_tissue_records': ("""
+        SELECT
+            *
+        FROM
+            {view}
+        WHERE
+            (genus, species) IN (
+                SELECT names.genus, names.species FROM unnest(:genera, :epithets) AS names(genus, species)
+            )
+        ORDER BY
+            sex ASC, year DESC
+        LIMIT 25
+        """, (('genera', 'text[]'), ('epithets', 'text[]'))),
+    'tissue_records': ("""
+        SELECT
+            {columns}
+        FROM
+            {view}
+        WHERE
+            (genus, species) IN (
+                SELECT names.genus, names.species FROM unnest(:genera, :epithets) AS names(genus, species)
+            )
+        ORDER BY
+            rank ASC, sex ASC, year DESC
+        LIMIT :num_taxa
+        """, (('genera', 'text[]'), ('epithets', 'text[]'), ('num_taxa', 'integer'))),
+    'batched_tissue_records': ("""
+        SELECT
+            taxon, {columns}
+        FROM (
+            SELECT
+                requested.taxon,
+                {view_columns},
+                row_number() OVER (
+                    PARTITION BY requested.taxon
+                    ORDER BY {view}.rank ASC, {view}.sex ASC, {view}.year DESC
+                ) AS taxon_row
+            FROM
+                {view}
+                JOIN unnest(:taxa, :genera, :epithets) AS requested(taxon, genus, species)
+                    ON {view}.genus = requested.genus AND {view}.species = requested.species
+        ) ranked
+        WHERE
+            taxon_row <= :num_taxa
+        ORDER BY
+            taxon, taxon_row
+        """, (('taxa', 'text[]'), ('genera', 'text[]'), ('epithets', 'text[]'), ('num_taxa', 'integer'))),
+    'presence_family_counts': ("""
+        SELECT
+            holdings_presence.family,
+            count(*) as {view}
+        FROM
+            holdings_presence
+        WHERE
+            holdings_presence.source = '{view}'
+            AND holdings_presence.direct
+        GROUP BY
+            holdings_presence.family
+        """, ()),
+    'presence_genera_counts': ("""
+        SELECT
+            holdings_presence.genus,
+            count(*) as {view}
+        FROM
+            holdings_presence
+        WHERE
+            holdings_presence.source = '{view}'
+            AND holdings_presence.family = :family
+            AND holdings_presence.direct
+        GROUP BY
+            holdings_presence.genus
+        """, (('family', 'text'),)),
+    'presence_species_counts': ("""
+        SELECT
+            holdings_presence.genus,
+            holdings_presence.species,
+            holdings_presence.records as {view}
+        FROM
+            holdings_presence
+        WHERE
+            holdings_presence.source = '{view}'
+            AND holdings_presence.family = :family
+            AND holdings_presence.direct
+        """, (('family', 'text'),)),
+}
+
+_BIND = re.compile(r'(?<![:\w]):(\w+)')
+_WORD = re.compile(r'\w+')
+
+
+def add_cache_arguments(parser):
+    """Add the on-disk result cache options to an argparse parser"""
+    parser.add_argument(
+        '--result-cache',
+        default=None,
+        help="""A directory in which to cache query results as Parquet (requires pyarrow)."""
+    )
+    parser.add_argument(
+        '--result-cache-size',
+        type=int,
+        default=1024,
+        help="""The maximum size of the result cache, in MB."""
+    )
+    parser.add_argument(
+        '--query-report',
+        action='store_true',
+        default=False,
+        help="""Print prepared-statement reuse and result cache statistics at the end of the run."""
+    )
+    return parser
+
+
+def configure_from_args(args):
+    if getattr(args, 'result_cache', None):
+        CATALOG.enable_cache(args.result_cache, args.result_cache_size)
+
+
+def print_report(args):
+    """Print the catalog report if --query-report was given"""
+    if getattr(args, 'query_report', False):
+        print(CATALOG.report())
+
+
+def split_names(taxon):
+    """Turn [(genus, species), ...] into the (genera, epithets) array params"""
+    return [name[0] for name in taxon], [name[1] for name in taxon]
+
+
+class QueryTemplate(object):
+    """One query shape bound to one view, with its PREPARE/EXECUTE forms and
+    the unprepared form used for streaming"""
+    def __init__(self, name, sql, params):
+        self.name = name
+        self.sql = sql
+        self.params = params
+        self.words = frozenset(_WORD.findall(sql))
+        positions = {param: i + 1 for i, (param, kind) in enumerate(params)}
+        kinds = dict(params)
+        self.stream_sql = _BIND.sub(lambda m: "CAST(:{0} AS {1})".format(m.group(1), kinds[m.group(1)]), sql)
+        if params:
+            self.prepare_sql = "PREPARE {0} ({1}) AS {2}".format(
+                name,
+                ", ".join([kind for param, kind in params]),
+                _BIND.sub(lambda m: "${}".format(positions[m.group(1)]), sql)
+            )
+            self.execute_sql = "EXECUTE {0}({1})".format(
+                name,
+                ", ".join([":{}".format(param) for param, kind in params])
+            )
+        else:
+            self.prepare_sql = "PREPARE {0} AS {1}".format(name, sql)
+            self.execute_sql = "EXECUTE {0}".format(name)
+
+
+class QueryCatalog(object):
+    """Hand out prepared statements per connection and keep count of how
+    often each one was reused"""
+    def __init__(self, shapes=SHAPES, views=VIEWS):
+        self.shapes = shapes
+        self.views = views
+        self.templates = {}
+        self.executions = {}
+        self.preparations = {}
+        self.plan_ms = {}
+        self.streamed = {}
+        self.lock = threading.Lock()
+        self.cache = None
+        self.versions = None
+        self.categories = categories.CategoryDictionary()
+
+    def enable_cache(self, directory, max_mb):
+        self.cache = result_cache.ResultCache(directory, max_mb * 1024 * 1024)
+
+    def template(self, shape, view=None):
+        key = (shape, view)
+        if key not in self.templates:
+            if view is not None and view not in self.views:
+                raise ValueError("{} is not a known view".format(view))
+            sql, params = self.shapes[shape]
+            name = shape if view is None else "{}_{}".format(shape, view)
+            sql = sql.format(
+                view=view,
+                columns=", ".join(TISSUE_COLUMNS),
+                view_columns=", ".join(["{0}.{1}".format(view, column) for column in TISSUE_COLUMNS])
+            )
+            self.templates[key] = QueryTemplate(name, sql, params)
+        return self.templates[key]
+
+    def sample_plan_time(self, connection, template, params):
+        """Planning time (ms) of the statement as a fresh, unprepared query"""
+        plan = connection.execute(
+            text("EXPLAIN (SUMMARY TRUE, FORMAT JSON) {}".format(template.sql)), params
+        ).scalar()
+        return plan[0].get('Planning Time', 0.0)
+
+    def prepare(self, connection, template, params):
+        prepared = connection.connection.info.setdefault('prepared_statements', set())
+        if template.name in prepared:
+            return
+        connection.execute(text(template.prepare_sql))
+        prepared.add(template.name)
+        with self.lock:
+            self.preparations[template.name] = self.preparations.get(template.name, 0) + 1
+            sample = template.name not in self.plan_ms
+            if sample:
+                self.plan_ms[template.name] = 0.0
+        if sample:
+            self.plan_ms[template.name] = self.sample_plan_time(connection, template, params)
+
+    def version(self, connection, template):
+        """Version of every table or view the statement mentions, or None if
+        any of them cannot be versioned; table versions are read once per run"""
+        with self.lock:
+            if self.versions is None:
+                self.versions = result_cache.get_table_versions(connection)
+        versions = [self.versions[word] for word in sorted(template.words) if word in self.versions]
+        if None in versions:
+            return None
+        return versions
+
+    def read(self, connection, shape, view=None, stream=False, **params):
+        template = self.template(shape, view)
+        key = None
+        version = self.version(connection, template) if self.cache is not None else None
+        if version is not None:
+            key = self.cache.key(shape, view, params, version)
+            df = self.cache.get(key)
+            if df is not None:
+                return self.categories.encode(df)
+        elif self.cache is not None:
+            # it reads a relation we can't version; never serve it from cache
+            self.cache.bypassed += 1
+        if stream:
+            df = access.read_sql_streamed(connection, text(template.stream_sql), params=params)
+            with self.lock:
+                self.streamed[template.name] = self.streamed.get(template.name, 0) + 1
+        else:
+            self.prepare(connection, template, params)
+            df = pd.read_sql_query(text(template.execute_sql), con=connection, params=params)
+            with self.lock:
+                self.executions[template.name] = self.executions.get(template.name, 0) + 1
+        if key is not None:
+            self.cache.put(key, df)
+        return self.categories.encode(df)
+
+    def report(self):
+        """Summarize reuse and the estimated parse/plan time saved"""
+        lines = ["Statement,Executions,Prepares,PlanMs,EstimatedSavedMs"]
+        total = 0.0
+        for name in sorted(self.executions):
+            reused = self.executions[name] - self.preparations.get(name, 0)
+            saved = reused * self.plan_ms.get(name, 0.0)
+            total += saved
+            lines.append("{},{},{},{:.3f},{:.1f}".format(
+                name, self.executions[name], self.preparations.get(name, 0), self.plan_ms.get(name, 0.0), saved
+            ))
+        lines.append("Estimated parse/plan time saved: {:.1f} ms".format(total))
+        for name in sorted(self.streamed):
+            lines.append("{} streamed (unprepared): {}".format(name, self.streamed[name]))
+        if self.cache is not None:
+            lines.append(self.cache.summary())
+        return "\n".join(lines)
+
+
+CATALOG = QueryCatalog()
+
+
+def read(connection, shape, view=None, stream=False, **params):
+    """Run a catalog query on connection and return a DataFrame; stream=True
+    fetches it over a server-side cursor, without preparing it"""
+    return CATALOG.read(connection, shape, view, stream, **params)
+
+
+def concat(frames, **kwargs):
+    """Stack catalog results without losing their shared categoricals"""
+    return CATALOG.categories.concat(frames, **kwargs)
+
+
+def merge(left, right, **kwargs):
+    """Merge catalog results on their shared categoricals"""
+    return CATALOG.categories.merge(left, right, **kwargs)
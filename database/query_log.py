@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+(c) 2026 Brant Faircloth || http://faircloth-lab.org/
+All rights reserved.
+
+This code is distributed under a 3-clause BSD license. Please see
+LICENSE.txt for more information.
+
+Created on Oct 18, 2026.
+
+Per-query instrumentation.  instrument() hooks an engine so every statement
+it runs (catalog reads, pd.read_sql_query calls, DDL) is recorded with its
+shape, source view, parameters, elapsed time and row count.  Shapes are the
+catalog statement name, or the SQL with literals and view names replaced by
+placeholders, so per-view and per-taxon variants group together.  Elapsed
+time covers execution only; rows fetched later from a server-side cursor
+are not counted (their row count is recorded as null).
+
+With --profile-queries the scripts print a ranked report at exit; with
+--query-log PATH each query is also written as a JSON line.
+"""
+
+import re
+import json
+import time
+import atexit
+import threading
+
+from sqlalchemy import event
+
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+_WORD = re.compile(r"\w+")
+_EXECUTE = re.compile(r"^\s*EXECUTE\s+(\w+)", re.IGNORECASE)
+_PREPARE = re.compile(r"^\s*PREPARE\s+(\w+)", re.IGNORECASE)
+_PARAMETER = re.compile(r"%\(\w+\)s|(?<![:\w]):\w+")
+
+# base tables that are worth reporting on their own
+TABLES = ('species', 'taxonomies', 'family', 'holdings_presence', 'tissues')
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+
+def _short(value):
+    """Keep JSON lines readable when a parameter is a long array of names"""
+    if isinstance(value, (list, tuple)) and len(value) > 5:
+        return list(value[:5]) + ["... {} total".format(len(value))]
+    return value
+
+
+class QueryLog(object):
+    """Timing and row counts for every statement run on the hooked engines"""
+    def __init__(self, views=(), json_path=None):
+        self.views = tuple(views)
+        self.relations = frozenset(self.views + TABLES)
+        self.lock = threading.Lock()
+        self.by_shape = {}
+        self.by_view = {}
+        # prepared statement name -> relation its body reads
+        self.prepared = {}
+        self.handle = open(json_path, 'a') if json_path else None
+
+    def describe(self, statement):
+        """Return (shape, view) for a statement"""
+        words = _WORD.findall(_PARAMETER.sub(' ', statement))
+        view = next((word for word in words if word in self.relations), None)
+        for pattern, kind in ((_EXECUTE, None), (_PREPARE, 'prepare')):
+            match = pattern.match(statement)
+            if match:
+                name = match.group(1)
+                # catalog statements are named shape_view
+                suffix = next((v for v in self.views if name.endswith("_{}".format(v))), None)
+                shape = name[:-len(suffix) - 1] if suffix else name
+                if kind is None:
+                    view = suffix or self.prepared.get(name)
+                else:
+                    view = suffix or view
+                    self.prepared[name] = view
+                return (shape if kind is None else "{} {}".format(kind, shape)), view
+        shape = _SPACE.sub(' ', _NUMBER.sub('?', _STRING.sub('?', statement))).strip()
+        for name in self.views:
+            shape = re.sub(r"\b{}\b".format(name), '{view}', shape)
+        return shape[:160], view
+
+    def record(self, statement, parameters, elapsed, rows):
+        shape, view = self.describe(statement)
+        with self.lock:
+            self.by_shape.setdefault(shape, []).append((elapsed, rows))
+            self.by_view.setdefault(view or '(none)', []).append(elapsed)
+            if self.handle is not None:
+                if isinstance(parameters, dict):
+                    parameters = {key: _short(value) for key, value in parameters.items()}
+                self.handle.write(json.dumps({
+                    'time': time.time(),
+                    'shape': shape,
+                    'view': view,
+                    'params': parameters,
+                    'elapsed_ms': round(elapsed * 1000.0, 3),
+                    'rows': rows
+                }, default=str) + "\n")
+
+    def report(self, top=20):
+        """Top shapes by total time, then p50/p95 per view (milliseconds)"""
+        lines = ["Shape,Calls,TotalMs,MeanMs,Rows"]
+        totals = sorted(self.by_shape.items(), key=lambda item: -sum([e for e, r in item[1]]))
+        for shape, calls in totals[:top]:
+            total = sum([elapsed for elapsed, rows in calls]) * 1000.0
+            rows = sum([r for e, r in calls if r is not None])
+            lines.append('"{}",{},{:.1f},{:.2f},{}'.format(shape.replace('"', '""'), len(calls), total, total / len(calls), rows))
+        lines.append("")
+        lines.append("View,Calls,TotalMs,P50Ms,P95Ms")
+        views = sorted(self.by_view.items(), key=lambda item: -sum(item[1]))
+        for view, elapsed in views:
+            lines.append("{},{},{:.1f},{:.2f},{:.2f}".format(
+                view, len(elapsed), sum(elapsed) * 1000.0,
+                percentile(elapsed, 0.5) * 1000.0, percentile(elapsed, 0.95) * 1000.0
+            ))
+        return "\n".join(lines)
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+
+def instrument(engine, log):
+    """Record every statement run on engine in log"""
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before(connection, cursor, statement, parameters, context, executemany):
+        connection.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after(connection, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - connection.info['query_started'].pop()
+        rows = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None
+        log.record(statement, parameters, elapsed, rows)
+
+    return log
+
+
+def report_at_exit(log, top=20):
+    def finish():
+        print(log.report(top))
+        log.close()
+    atexit.register(finish)
@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+(c) 2026 Brant Faircloth || http://faircloth-lab.org/
+All rights reserved.
+
+This code is distributed under a 3-clause BSD license. Please see
+LICENSE.txt for more information.
+
+Created on Oct 18, 2026.
+
+Streaming report output.  Rows are written to xlsx (xlsxwriter in
+constant_memory mode) and/or CSV one DataFrame chunk at a time, so peak
+memory is bounded by the chunk size rather than by the size of the report.
+Institution masking is applied per row while serializing, so full and masked
+reports come from the same pass without a second copy of the data.
+
+With index=True the first column holds each row's index label, as
+DataFrame.to_excel writes it; index='rows' numbers rows across all chunks
+instead, as appending the chunks with ignore_index=True would.
+"""
+
+import csv
+import math
+import configparser
+import time
+import datetime
+
+import numpy
+import pandas as pd
+import xlsxwriter
+
+
+def _to_cell(value):
+    """Convert a pandas/numpy value to something xlsxwriter writes natively"""
+    if value is None or value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, numpy.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return str(value)
+    return value
+
+
+class MaskingPolicy(object):
+    """Declarative per-institution mask: in rows whose icode is one of
+    `icodes`, replace `columns` with `replacement` as rows are written"""
+    def __init__(self, icodes, columns, replacement='xxx', icode_column='icode'):
+        self.icodes = frozenset(icodes)
+        self.columns = tuple(columns)
+        self.replacement = replacement
+        self.icode_column = icode_column
+
+    def positions(self, columns):
+        """Return (icode position, masked positions) for a set of columns"""
+        if self.icode_column not in columns:
+            return None, ()
+        return columns.index(self.icode_column), tuple([columns.index(c) for c in self.columns if c in columns])
+
+
+def load_masking_policies(path):
+    """Read masking policies from a config file with one section per policy:
+
+        [USNM]
+        icodes = USNM
+        columns = icode, year, catalognumber
+        replacement = xxx
+    """
+    conf = configparser.ConfigParser()
+    conf.optionxform = str
+    conf.read(path)
+    policies = []
+    for section in conf.sections():
+        icodes = conf[section].get('icodes', section)
+        policies.append(MaskingPolicy(
+            [icode.strip() for icode in icodes.split(',') if icode.strip()],
+            [column.strip() for column in conf[section]['columns'].split(',') if column.strip()],
+            conf[section].get('replacement', 'xxx')
+        ))
+    return policies
+
+
+class _StreamingSink(object):
+    """Shared row accounting for streaming sinks"""
+    def __init__(self, path, index=True):
+        self.path = path
+        self.index = index
+        self.columns = None
+        self.rows = 0
+        self.seconds = 0.0
+
+    def start(self, columns):
+        """Write the header the first time we see columns; check them after"""
+        if self.columns is None:
+            self.columns = list(columns)
+            header = [''] + self.columns if self.index else self.columns
+            self.write_header([str(column) for column in header])
+        elif list(columns) != self.columns:
+            raise ValueError("Chunk columns do not match the columns already written to {}".format(self.path))
+
+    def write_row(self, cells, label=None):
+        if self.index == 'rows':
+            cells = [self.rows] + cells
+        elif self.index:
+            cells = [_to_cell(label)] + cells
+        self.write_cells(cells)
+        self.rows += 1
+
+    def write(self, df):
+        write_chunk(df, [self])
+
+    @property
+    def rows_per_second(self):
+        if self.seconds == 0:
+            return 0.0
+        return self.rows / self.seconds
+
+    def summary(self):
+        return "Wrote {} rows to {} ({:.0f} rows/s)".format(self.rows, self.path, self.rows_per_second)
+
+
+class StreamingSheet(_StreamingSink):
+    """One worksheet of a StreamingWorkbook, written chunk by chunk"""
+    def __init__(self, workbook, worksheet, path, index=True):
+        _StreamingSink.__init__(self, path, index)
+        self.workbook = workbook
+        self.worksheet = worksheet
+        self.header = workbook.add_format({'bold': True})
+
+    def write_header(self, header):
+        # mirror DataFrame.to_excel: blank index header, then columns
+        self.worksheet.write_row(0, 0, header, self.header)
+
+    def write_cells(self, cells):
+        self.worksheet.write_row(self.rows + 1, 0, cells)
+
+
+class StreamingWorkbook(object):
+    """An xlsx workbook whose sheets are written row by row and flushed to disk"""
+    def __init__(self, path):
+        self.path = path
+        self.workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+        self.sheets = []
+
+    def add_sheet(self, name='Sheet1', index=True):
+        sheet = StreamingSheet(self.workbook, self.workbook.add_worksheet(name), self.path, index)
+        self.sheets.append(sheet)
+        return sheet
+
+    def close(self):
+        self.workbook.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class StreamingCsv(_StreamingSink):
+    """A CSV file written chunk by chunk"""
+    def __init__(self, path, index=True):
+        _StreamingSink.__init__(self, path, index)
+        self.handle = open(path, 'w', newline='')
+        self.writer = csv.writer(self.handle)
+
+    def write_header(self, header):
+        self.writer.writerow(header)
+
+    def write_cells(self, cells):
+        self.writer.writerow(['' if cell is None else cell for cell in cells])
+
+    def close(self):
+        self.handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class StreamingReport(object):
+    """A single-sheet xlsx report, optionally mirrored to CSV, with masking
+    policies applied to each row as it is written"""
+    def __init__(self, xlsx_path, csv_path=None, sheet_name='Sheet1', index='rows', masks=None):
+        self.workbook = StreamingWorkbook(xlsx_path)
+        self.sinks = [self.workbook.add_sheet(sheet_name, index)]
+        self.masks = list(masks or [])
+        self.csv = None
+        if csv_path is not None:
+            self.csv = StreamingCsv(csv_path, index)
+            self.sinks.append(self.csv)
+
+    def write(self, df):
+        write_chunk(df, [self])
+
+    def close(self):
+        self.workbook.close()
+        if self.csv is not None:
+            self.csv.close()
+        for sink in self.sinks:
+            print(sink.summary())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def write_chunk(df, reports):
+    """Serialize each row of df once and hand it to every report (or sink),
+    masking a copy of the row only for reports whose policies match it"""
+    start = time.time()
+    columns = list(df.columns)
+    targets = []
+    for report in reports:
+        sinks = getattr(report, 'sinks', [report])
+        for sink in sinks:
+            sink.start(columns)
+        masks = [(policy, policy.positions(columns)) for policy in getattr(report, 'masks', [])]
+        masks = [(policy, icode, positions) for policy, (icode, positions) in masks if icode is not None]
+        targets.append((sinks, masks))
+    for row in df.itertuples(index=True, name=None):
+        label = row[0]
+        cells = [_to_cell(value) for value in row[1:]]
+        for sinks, masks in targets:
+            out = cells
+            for policy, icode, positions in masks:
+                if cells[icode] in policy.icodes:
+                    out = list(out)
+                    for position in positions:
+                        out[position] = policy.replacement
+            for sink in sinks:
+                sink.write_row(out, label)
+    elapsed = time.time() - start
+    for sinks, masks in targets:
+        for sink in sinks:
+            sink.seconds += elapsed
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+(c) 2026 Brant Faircloth || http://faircloth-lab.org/
+All rights reserved.
+
+This code is distributed under a 3-clause BSD license. Please see
+LICENSE.txt for more information.
+
+Created on Oct 18, 2026.
+
+Persistent, size-bounded cache of query results stored as Parquet files.
+Entries are keyed by query shape, view, parameters and a version fingerprint
+of the base tables the query reads, so reloading a museum feed changes the
+key and old entries simply age out under LRU eviction.
+
+A table's version is its relfilenode (which TRUNCATE, VACUUM FULL and
+CLUSTER replace) and its insert/update/delete counters from
+pg_stat_user_tables, tagged with the server start time and the database's
+statistics reset time: the counters restart from zero after pg_stat_reset()
+or a crash, which then changes every key rather than letting a counter climb
+back to an old value.  Views are resolved to their base tables through the
+rewrite rules in pg_depend.  Relations that cannot be versioned this way
+(foreign or partitioned tables, views that call user-defined functions,
+names in more than one schema) get None, and queries that read them bypass
+the cache.
+
+The counters are collected asynchronously: a loading session publishes them
+when its transaction ends and it goes idle (at the latest when it exits), so
+run reports once loads have finished.
+"""
+
+import os
+import json
+import hashlib
+
+import pandas as pd
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+def get_view_tables(connection, opaque=()):
+    """Return {view: set of base tables} for every view, following views of
+    views down to tables; views in opaque are not followed but returned as
+    if they were tables"""
+    usage = pd.read_sql_query("""
+        SELECT DISTINCT
+            dependent.relname AS view_name, used.relname AS table_name
+        FROM
+            pg_depend
+            JOIN pg_rewrite ON pg_rewrite.oid = pg_depend.objid
+            JOIN pg_class dependent ON dependent.oid = pg_rewrite.ev_class
+            JOIN pg_class used ON used.oid = pg_depend.refobjid
+            JOIN pg_namespace ON pg_namespace.oid = dependent.relnamespace
+        WHERE
+            pg_depend.classid = 'pg_rewrite'::regclass
+            AND pg_depend.refclassid = 'pg_class'::regclass
+            AND pg_depend.deptype = 'n'
+            AND dependent.relkind = 'v'
+            AND used.oid != dependent.oid
+            AND pg_namespace.nspname NOT IN ('pg_catalog', 'information_schema');
+        """, con=connection)
+    uses = {}
+    for view, table in usage.itertuples(index=False, name=None):
+        uses.setdefault(view, set()).add(table)
+
+    def base_tables(relation, seen):
+        if relation in seen:
+            return set()
+        seen.add(relation)
+        if relation not in uses or relation in opaque:
+            return set([relation])
+        found = set()
+        for table in uses[relation]:
+            found |= base_tables(table, seen)
+        return found
+
+    return {view: base_tables(view, set()) for view in uses}
+
+
+def get_function_views(connection):
+    """Return the views whose rules call a user-defined function; what the
+    function reads is invisible to pg_depend"""
+    df = pd.read_sql_query("""
+        SELECT DISTINCT
+            dependent.relname AS view_name
+        FROM
+            pg_depend
+            JOIN pg_rewrite ON pg_rewrite.oid = pg_depend.objid
+            JOIN pg_class dependent ON dependent.oid = pg_rewrite.ev_class
+            JOIN pg_proc ON pg_proc.oid = pg_depend.refobjid
+            JOIN pg_namespace ON pg_namespace.oid = pg_proc.pronamespace
+        WHERE
+            pg_depend.classid = 'pg_rewrite'::regclass
+            AND pg_depend.refclassid = 'pg_proc'::regclass
+            AND pg_namespace.nspname NOT IN ('pg_catalog', 'information_schema');
+        """, con=connection)
+    return set(df['view_name'])
+
+
+def get_table_versions(connection):
+    """Return {relation: version} for every table, and every view resolved
+    to the tables underneath it; relations that cannot be versioned map to
+    None"""
+    epoch = pd.read_sql_query("""
+        SELECT
+            pg_postmaster_start_time() AS started,
+            pg_stat_get_db_stat_reset_time(oid) AS reset
+        FROM
+            pg_database
+        WHERE
+            datname = current_database();
+        """, con=connection)
+    epoch = "{}/{}".format(epoch['started'][0], epoch['reset'][0])
+    stats = pd.read_sql_query("""
+        SELECT
+            pg_class.relname, pg_class.relkind, pg_class.relfilenode,
+            pg_stat_user_tables.n_tup_ins, pg_stat_user_tables.n_tup_upd, pg_stat_user_tables.n_tup_del
+        FROM
+            pg_class
+            JOIN pg_namespace ON pg_namespace.oid = pg_class.relnamespace
+            LEFT JOIN pg_stat_user_tables ON pg_stat_user_tables.relid = pg_class.oid
+        WHERE
+            pg_class.relkind IN ('r', 'p', 'm', 'v', 'f')
+            AND pg_namespace.nspname NOT IN ('pg_catalog', 'information_schema')
+            AND pg_namespace.nspname NOT LIKE 'pg_toast%';
+        """, con=connection)
+    duplicated = set(stats['relname'][stats['relname'].duplicated()])
+    versions = {}
+    for relname, relkind, relfilenode, ins, upd, dele in stats.itertuples(index=False, name=None):
+        if relname in duplicated or relkind not in ('r', 'm') or pd.isnull(ins):
+            versions[relname] = None
+        else:
+            versions[relname] = "{}:{}:{}:{}:{}:{}".format(relname, relfilenode, int(ins), int(upd), int(dele), epoch)
+    # views calling functions stay unresolved (None), as do the views above them
+    for view, base in get_view_tables(connection, get_function_views(connection)).items():
+        if view in duplicated:
+            continue
+        tables = [versions.get(table) for table in sorted(base)]
+        versions[view] = None if None in tables else "|".join(tables)
+    return versions
+
+
+class ResultCache(object):
+    """Parquet files in a directory, evicted least recently used first once
+    their total size exceeds max_bytes"""
+    def __init__(self, directory, max_bytes):
+        if pyarrow is None:
+            raise ImportError("The result cache needs pyarrow; install it or drop --result-cache")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def key(self, shape, view, params, version):
+        payload = json.dumps([shape, view, params, version], sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, "{}.parquet".format(key))
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            df = pd.read_parquet(path)
+        except (IOError, OSError):
+            self.misses += 1
+            return None
+        # mark as recently used
+        os.utime(path, None)
+        self.hits += 1
+        return df
+
+    def put(self, key, df):
+        path = self.path(key)
+        temp = "{}.{}.tmp".format(path, os.getpid())
+        try:
+            df.to_parquet(temp, index=False)
+        except (ValueError, TypeError):
+            # mixed-type object columns can't be stored; just don't cache them
+            if os.path.exists(temp):
+                os.remove(temp)
+            return
+        os.replace(temp, path)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.parquet'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum([size for mtime, size, path in entries])
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def summary(self):
+        return "Result cache: {} hits, {} misses, {} bypassed (unversioned relations)".format(
+            self.hits, self.misses, self.bypassed
+        )
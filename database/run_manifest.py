@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+(c) 2026 Brant Faircloth || http://faircloth-lab.org/
+All rights reserved.
+
+This code is distributed under a 3-clause BSD license. Please see
+LICENSE.txt for more information.
+
+Created on Oct 18, 2026.
+
+Checkpoints for long runs.  A manifest directory holds manifest.jsonl - a
+header line identifying the run, then one line per completed unit of work
+(a family, or a chunk of tissue taxa) with the sha1 of every file it wrote,
+its stdout and any small results - and parts/, where units whose output goes
+into a shared report keep a pickled copy of their rows.
+
+A manifest is only kept when asked for, with --manifest DIR or --resume
+(which uses the report's default directory unless --manifest is given).
+Lines are flushed and fsynced as each unit finishes, so after a crash or a
+dropped connection, --resume skips every unit whose files are still there
+and unchanged, replays its stdout and stored rows, and only runs the rest.
+A manifest from a run with different arguments, on another day or in
+another directory (the reports write dated files to the working directory)
+is discarded.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+from datetime import date
+
+import pandas as pd
+
+
+# arguments that change how a run executes, not what it writes
+EXECUTION_ARGUMENTS = (
+    'workers', 'resume', 'manifest', 'default_manifest', 'profile_queries', 'query_log', 'pool_size',
+    'result_cache', 'result_cache_size', 'query_report'
+)
+
+
+def add_manifest_arguments(parser, default):
+    parser.add_argument(
+        '--manifest',
+        default=None,
+        help="""The directory in which to checkpoint completed work (with --resume, defaults to {}).""".format(default)
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        default=False,
+        help="""Skip work the manifest records as complete and reuse its results."""
+    )
+    parser.set_defaults(default_manifest=default)
+
+
+def get_run_key(args):
+    """sha1 of the script, the arguments that affect its output, the date
+    and the working directory (which name the files it writes)"""
+    arguments = {key: value for key, value in sorted(vars(args).items()) if key not in EXECUTION_ARGUMENTS}
+    arguments['script'] = os.path.basename(sys.argv[0])
+    arguments['date'] = str(date.today())
+    arguments['cwd'] = os.getcwd()
+    return hashlib.sha1(json.dumps(arguments, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def get_manifest(args):
+    """The RunManifest for this run, or None unless --manifest or --resume
+    was given"""
+    if args.manifest is None and not args.resume:
+        return None
+    return RunManifest(args.manifest or args.default_manifest, get_run_key(args), args.resume)
+
+
+def fingerprint(path):
+    """sha1 of a file, or of every file under a directory"""
+    digest = hashlib.sha1()
+    if os.path.isdir(path):
+        paths = sorted([os.path.join(root, name) for root, dirs, names in os.walk(path) for name in names])
+    else:
+        paths = [path]
+    for name in paths:
+        with open(name, 'rb') as infile:
+            for block in iter(lambda: infile.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class RunManifest(object):
+    """Completed units of work for one run, keyed by name"""
+    def __init__(self, directory, run_key, resume=False):
+        self.directory = directory
+        self.path = os.path.join(directory, 'manifest.jsonl')
+        self.parts = os.path.join(directory, 'parts')
+        self.run_key = run_key
+        self.entries = {}
+        self.skipped = 0
+        if resume and os.path.isfile(self.path):
+            self.load()
+        else:
+            self.start()
+        self.handle = open(self.path, 'a')
+
+    def start(self):
+        if os.path.isdir(self.parts):
+            shutil.rmtree(self.parts)
+        os.makedirs(self.parts)
+        with open(self.path, 'w') as outfile:
+            outfile.write(json.dumps({'run': self.run_key, 'started': time.time()}) + "\n")
+
+    def load(self):
+        with open(self.path) as infile:
+            lines = infile.readlines()
+        header = json.loads(lines[0]) if lines else {}
+        if header.get('run') != self.run_key:
+            print("Manifest {} is from a run with different arguments; starting over.".format(self.directory))
+            self.start()
+            return
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # the line being written when the run stopped
+                continue
+            self.entries[entry['key']] = entry
+
+    def completed(self, key, **expected):
+        """The entry for key if it finished with the expected values and its
+        files are unchanged"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        for name, value in expected.items():
+            if entry.get(name) != value:
+                return None
+        for path, digest in entry['files'].items():
+            if not os.path.exists(path) or fingerprint(path) != digest:
+                return None
+        self.skipped += 1
+        return entry
+
+    @staticmethod
+    def chunk_key(offset):
+        return "chunk {}".format(offset)
+
+    def completed_chunks(self, taxa, chunk_size):
+        """[(offset, chunk, entry)] for the leading chunks of taxa that are
+        complete; work resumes at the first chunk that is not"""
+        done = []
+        for offset in range(0, len(taxa), chunk_size):
+            chunk = list(taxa[offset:offset + chunk_size])
+            entry = self.completed(self.chunk_key(offset), taxa=chunk)
+            if entry is None:
+                break
+            done.append((offset, chunk, entry))
+        return done
+
+    def part_path(self, key):
+        return os.path.abspath(os.path.join(self.parts, "{}.pkl".format(hashlib.sha1(key.encode('utf-8')).hexdigest())))
+
+    def save_part(self, key, df):
+        """Pickle df as the stored result of key; returns its path"""
+        path = self.part_path(key)
+        df.to_pickle(path)
+        return path
+
+    def load_part(self, path):
+        return pd.read_pickle(path)
+
+    def record(self, key, files=(), output='', **results):
+        """Mark key complete, with the files it wrote"""
+        entry = dict(results, key=key, output=output, files={
+            os.path.abspath(path): fingerprint(path) for path in files if path is not None
+        })
+        self.entries[key] = entry
+        self.handle.write(json.dumps(entry, default=str) + "\n")
+        self.handle.flush()
+        os.fsync(self.handle.fileno())
+        return entry
+
+    def summary(self):
+        return "Manifest {}: {} units complete, {} reused".format(self.directory, len(self.entries), self.skipped)
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+(c) 2026 Brant Faircloth || http://faircloth-lab.org/
+All rights reserved.
+
+This code is distributed under a 3-clause BSD license. Please see
+LICENSE.txt for more information.
+
+Created on Oct 18, 2026.
+
+In-memory synonym index built once from the taxonomies table.  Names are
+linked (genus, species) <-> (alt_genus, alt_species) across taxonomy_id
+1..7 and grouped by transitive closure, so that splits and lumps resolve to
+the same set of equivalent names regardless of the starting taxonomy.
+"""
+
+import os
+import pickle
+
+import pandas as pd
+
+import access
+
+
+TAXONOMY_IDS = (1, 2, 3, 4, 5, 6, 7)
+
+
+class SynonymIndex(object):
+    """Map each (genus, species) to every name equivalent to it"""
+    def __init__(self, pairs):
+        parent = {}
+
+        def find(name):
+            root = name
+            while parent[root] != root:
+                root = parent[root]
+            # compress the path we just walked
+            while parent[name] != root:
+                parent[name], name = root, parent[name]
+            return root
+
+        for name, alt_name in pairs:
+            parent.setdefault(name, name)
+            parent.setdefault(alt_name, alt_name)
+            root, alt_root = find(name), find(alt_name)
+            if root != alt_root:
+                parent[alt_root] = root
+        groups = {}
+        for name in parent:
+            groups.setdefault(find(name), []).append(name)
+        self._equivalents = {}
+        for members in groups.values():
+            members = tuple(sorted(members))
+            for name in members:
+                self._equivalents[name] = members
+
+    def __len__(self):
+        return len(self._equivalents)
+
+    def __contains__(self, taxon):
+        return tuple(taxon) in self._equivalents
+
+    def equivalents(self, taxon):
+        """Return taxon followed by every equivalent name, across taxonomies"""
+        taxon = tuple(taxon)
+        others = [name for name in self._equivalents.get(taxon, ()) if name != taxon]
+        return [taxon] + others
+
+
+def get_taxonomies_fingerprint(connection):
+    df = pd.read_sql_query("""
+        SELECT
+            count(*) AS rows,
+            md5(string_agg(
+                concat_ws(' ', taxonomy_id, genus, species, alt_genus, alt_species), ','
+                ORDER BY taxonomy_id, genus, species, alt_genus, alt_species
+            )) AS digest
+        FROM
+            taxonomies;
+        """, con=connection)
+    return "{}-{}".format(df['rows'][0], df['digest'][0])
+
+
+def get_synonym_pairs(connection):
+    """Yield (name, alt_name) pairs, chunk by chunk"""
+    chunks = access.read_sql_chunks(connection, """
+        SELECT DISTINCT
+            genus, species, alt_genus, alt_species
+        FROM
+            taxonomies
+        WHERE
+            taxonomy_id IN ({0})
+            AND alt_genus IS NOT NULL
+            AND alt_species IS NOT NULL;
+        """.format(",".join([str(i) for i in TAXONOMY_IDS])))
+    for df in chunks:
+        for pair in zip(zip(df['genus'], df['species']), zip(df['alt_genus'], df['alt_species'])):
+            yield pair
+
+
+def load_synonym_index(connection, cache_path=None):
+    """Build the synonym index, reusing a pickled copy at cache_path when the
+    taxonomies table has not changed since it was written"""
+    if cache_path is None:
+        return SynonymIndex(get_synonym_pairs(connection))
+    fingerprint = get_taxonomies_fingerprint(connection)
+    if os.path.isfile(cache_path):
+        with open(cache_path, 'rb') as infile:
+            cached = pickle.load(infile)
+        if cached.get('fingerprint') == fingerprint:
+            return cached['index']
+    index = SynonymIndex(get_synonym_pairs(connection))
+    with open(cache_path, 'wb') as outfile:
+        pickle.dump({'fingerprint': fingerprint, 'index': index}, outfile)
+    return index
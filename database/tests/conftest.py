@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the scripts in database/ import their siblings directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import create_engine, event, text
+
+import access
+
+
+@pytest.fixture
+def connection():
+    engine = create_engine('sqlite://')
+    with engine.connect() as connection:
+        connection.execute(text("CREATE TABLE species (genus text, species text)"))
+        connection.execute(text("INSERT INTO species VALUES ('Anas', 'acuta'), ('Anas', 'crecca'), ('Aix', 'sponsa')"))
+        yield connection
+
+
+def record_statements(connection):
+    streamed = []
+
+    @event.listens_for(connection, 'before_cursor_execute')
+    def record(conn, cursor, statement, parameters, context, executemany):
+        streamed.append((statement, context.execution_options.get('stream_results', False)))
+
+    return streamed
+
+
+def test_read_sql_chunks(connection):
+    chunks = list(access.read_sql_chunks(connection, "SELECT * FROM species ORDER BY species", chunksize=2))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert list(chunks[0].columns) == ['genus', 'species']
+
+
+def test_empty_result_keeps_columns(connection):
+    df = access.read_sql_streamed(connection, "SELECT * FROM species WHERE genus = :genus", params={'genus': 'Mergus'})
+    assert len(df) == 0
+    assert list(df.columns) == ['genus', 'species']
+
+
+def test_stream_then_prepare_on_same_connection(connection):
+    statements = record_statements(connection)
+    access.read_sql_streamed(connection, "SELECT * FROM species")
+    # the catalog prepares and executes on the connection it was handed
+    connection.execute(text("SELECT count(*) FROM species")).scalar()
+    assert 'stream_results' not in connection.get_execution_options()
+    assert [stream for statement, stream in statements] == [True, False]
+
+
+def test_execute_is_not_streamed(connection):
+    with pytest.raises(ValueError):
+        access.read_sql_streamed(connection, text("EXECUTE reference_species(:family)"), params={'family': 'Anatidae'})
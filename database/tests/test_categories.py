@@ -0,0 +1,20 @@
+import pandas as pd
+
+from categories import CategoryDictionary
+
+
+def test_merge_frames_encoded_before_the_list_grew():
+    categories = CategoryDictionary()
+    reference = categories.encode(pd.DataFrame({'genus': ['Anas', 'Aix'], 'count': [2, 1]}))
+    holdings = categories.encode(pd.DataFrame({'genus': ['Mergus', 'Anas'], 'v_amnh': [3, 4]}))
+    merged = categories.merge(reference, holdings, on='genus', how='outer')
+    assert isinstance(merged['genus'].dtype, pd.CategoricalDtype)
+    assert list(merged['genus'].dtype.categories) == ['Aix', 'Anas', 'Mergus']
+    assert merged.set_index('genus')['v_amnh'].fillna(-1).to_dict() == {'Aix': -1, 'Anas': 4, 'Mergus': 3}
+
+
+def test_encode_adds_values_missing_from_a_cached_frame():
+    categories = CategoryDictionary()
+    categories.encode(pd.DataFrame({'genus': ['Anas']}))
+    cached = pd.DataFrame({'genus': pd.Categorical(['Cairina'])})
+    assert list(categories.encode(cached)['genus']) == ['Cairina']
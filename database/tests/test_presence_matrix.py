@@ -0,0 +1,26 @@
+import pandas as pd
+
+from presence_matrix import PresenceMatrix
+
+
+def reference():
+    return pd.DataFrame({
+        'genus': ['Anas', 'Aix', 'Anas', 'Mergus'],
+        'species': ['acuta', 'sponsa', 'acuta', 'merganser']
+    })
+
+
+def test_duplicated_reference_species_are_all_marked():
+    matrix = PresenceMatrix(reference(), ('v_amnh', 'v_ku'))
+    matrix.mark('v_amnh', pd.DataFrame({'genus': ['Anas', 'Cairina'], 'species': ['acuta', 'moschata']}))
+    matrix.mark('v_ku', pd.DataFrame({'genus': ['Mergus'], 'species': ['merganser']}), 3)
+    df = matrix.frame()
+    assert list(df['present_v_amnh']) == [True, False, True, False]
+    assert list(df['present_v_ku']) == [False, False, False, True]
+    assert list(df['all_museums_totals']) == [1, 0, 1, 1]
+
+
+def test_frame_keeps_reference_labels():
+    ref = reference().set_axis([10, 11, 12, 13])
+    matrix = PresenceMatrix(ref, ('v_amnh',)).take([3, 0])
+    assert list(matrix.frame().index) == [13, 10]
@@ -0,0 +1,30 @@
+import pandas as pd
+
+from report_writer import StreamingCsv, StreamingReport, StreamingWorkbook
+
+
+def test_sheet_writes_index_labels_like_to_excel(tmp_path):
+    df = pd.DataFrame({'genus': ['Cairina', 'Anas', 'Aix'], 'species': ['moschata', 'acuta', 'sponsa']})
+    df.sort_values(['genus', 'species'], inplace=True)
+    path = str(tmp_path / 'sorted.xlsx')
+    with StreamingWorkbook(path) as workbook:
+        workbook.add_sheet('Totals by Museum').write(df)
+    expected = str(tmp_path / 'expected.xlsx')
+    df.to_excel(expected, sheet_name='Totals by Museum')
+    pd.testing.assert_frame_equal(pd.read_excel(path, index_col=0), pd.read_excel(expected, index_col=0))
+
+
+def test_csv_writes_index_labels(tmp_path):
+    df = pd.DataFrame({'genus': ['Anas', 'Aix']}, index=[7, 3])
+    path = str(tmp_path / 'labels.csv')
+    with StreamingCsv(path) as sink:
+        sink.write(df)
+    assert list(pd.read_csv(path, index_col=0).index) == [7, 3]
+
+
+def test_report_numbers_rows_across_chunks(tmp_path):
+    path = str(tmp_path / 'report.csv')
+    with StreamingReport(str(tmp_path / 'report.xlsx'), path) as report:
+        report.write(pd.DataFrame({'genus': ['Anas', 'Aix']}, index=[5, 4]))
+        report.write(pd.DataFrame({'genus': ['Mergus']}, index=[0]))
+    assert list(pd.read_csv(path, index_col=0).index) == [0, 1, 2]
@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+(c) 2026 Brant Faircloth || http://faircloth-lab.org/
+All rights reserved.
+
+This code is distributed under a 3-clause BSD license. Please see
+LICENSE.txt for more information.
+
+Created on Oct 18, 2026.
+
+Compare two versions of the IOC XML list and apply only the differences to
+species, family and the taxonomies crosswalk, instead of reloading species
+wholesale and patching taxonomies by hand.
+
+Species are compared as sets of (genus, species) keys, with a row hash to
+catch attribute changes (family, authority, common name...).  Unmatched
+removals/additions are then classified with hash lookups:
+
+    renamed  - one removed and one added species share (epithet, authority)
+               or the same English name (genus moves, respellings)
+    split    - an added species' (epithet, authority) was a subspecies of
+               exactly one old species (in the same genus, if several share
+               it); a renamed parent is taken under its new name
+    lumped   - a removed species' (epithet, authority) is now a subspecies of
+               exactly one new species
+
+Renamed and lumped reference names are repointed in taxonomies and the old
+name is kept as an alternate (--taxonomy-id) so museum records filed under
+it still resolve; split daughters inherit the parent's alternates.  The
+families touched by any change are printed (and written with
+--affected-families) so downstream caches know what to rebuild.
+'''
+
+import csv
+import argparse
+import hashlib
+import logging
+from collections import defaultdict
+
+from sqlalchemy import text
+
+from process_IOC_for_species import FullPaths, iterparse_ioc, get_engine, SPECIES_COLUMNS, FAMILY_COLUMNS
+
+
+# families moving order or changing English name still count as affected
+FAMILY_FIELDS = ('name', 'ordr', 'common')
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description="""Apply the differences between two IOC XML lists to species and taxonomies""",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        '--old-xml',
+        required=True,
+        action=FullPaths,
+        help="""The IOC XML list currently loaded in species."""
+    )
+    parser.add_argument(
+        '--new-xml',
+        required=True,
+        action=FullPaths,
+        help="""The new IOC XML list."""
+    )
+    parser.add_argument(
+        '--taxonomy-id',
+        type=int,
+        default=None,
+        help="""The taxonomy_id under which old names are recorded as alternates (required to apply)."""
+    )
+    parser.add_argument(
+        '--output',
+        action=FullPaths,
+        default='ioc_changes.csv',
+        help="""A CSV listing every change."""
+    )
+    parser.add_argument(
+        '--affected-families',
+        action=FullPaths,
+        default=None,
+        help="""Write the affected families, one per line, to this file."""
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        default=False,
+        help="""Report the changes without touching the database."""
+    )
+    parser.add_argument(
+        '--access-path',
+        default='access.conf',
+        help="""The path to the database access.conf file."""
+    )
+    return parser.parse_args()
+
+
+def row_hash(row, columns):
+    return hashlib.md5("\t".join([str(row[column]) for column in columns]).encode('utf-8')).hexdigest()
+
+
+class IOCList(object):
+    """The species, families and subspecies of one IOC list, indexed by key"""
+    def __init__(self, path):
+        self.path = path
+        self.attrib = {}
+        self.species = {}
+        self.families = {}
+        # (subspecies epithet, authority) -> [(genus, species) of its species]
+        self.subspecies = defaultdict(list)
+        for kind, row in iterparse_ioc(path):
+            if kind == 'root':
+                self.attrib = row
+            elif kind == 'family':
+                self.families[row['name']] = row
+            elif kind == 'species':
+                self.species[(row['genus'], row['species'])] = row
+            else:
+                self.subspecies[(row['subspecies'], row['authority'])].append((row['genus'], row['species']))
+
+    @property
+    def version(self):
+        return self.attrib.get('version')
+
+
+def identity(row):
+    return (row['species'], row['authority'])
+
+
+def species_row(old, new, name):
+    """The row for name in old, or in new for names that only exist there"""
+    return old.species[name] if name in old.species else new.species[name]
+
+
+def unique_parent(subspecies, row):
+    """The species holding a subspecies with row's (epithet, authority), or
+    None unless exactly one does (after preferring row's genus)"""
+    candidates = sorted(set(subspecies.get(identity(row), ())))
+    if len(candidates) > 1:
+        candidates = [name for name in candidates if name[0] == row['genus']]
+    if len(candidates) == 1:
+        return candidates[0]
+    return None
+
+
+def match_one_to_one(removed, added, old, new, key):
+    """Pair removed and added names whose key is unique on both sides"""
+    removed_by_key = defaultdict(list)
+    added_by_key = defaultdict(list)
+    for name in removed:
+        removed_by_key[key(old[name])].append(name)
+    for name in added:
+        added_by_key[key(new[name])].append(name)
+    pairs = []
+    for value in set(removed_by_key) & set(added_by_key):
+        if value and len(removed_by_key[value]) == 1 and len(added_by_key[value]) == 1:
+            pairs.append((removed_by_key[value][0], added_by_key[value][0]))
+    return pairs
+
+
+def diff_ioc(old, new):
+    """Return a dict of change lists between two IOCLists"""
+    old_names = set(old.species)
+    new_names = set(new.species)
+    removed = old_names - new_names
+    added = new_names - old_names
+    changed = sorted([
+        name for name in old_names & new_names
+        if row_hash(old.species[name], SPECIES_COLUMNS) != row_hash(new.species[name], SPECIES_COLUMNS)
+    ])
+    renamed = []
+    for key in (identity, lambda row: row['common']):
+        pairs = match_one_to_one(removed, added, old.species, new.species, key)
+        renamed.extend(pairs)
+        removed -= set([pair[0] for pair in pairs])
+        added -= set([pair[1] for pair in pairs])
+    # a split parent renamed in this version is found under its new name
+    renamed_to = dict(renamed)
+    split = []
+    for name in sorted(added):
+        parent = unique_parent(old.subspecies, new.species[name])
+        if parent is not None:
+            split.append((renamed_to.get(parent, parent), name))
+    added -= set([pair[1] for pair in split])
+    lumped = []
+    for name in sorted(removed):
+        into = unique_parent(new.subspecies, old.species[name])
+        if into is not None and into in new.species:
+            lumped.append((name, into))
+    removed -= set([pair[0] for pair in lumped])
+    return {
+        'added': sorted(added),
+        'removed': sorted(removed),
+        'changed': changed,
+        'renamed': sorted(renamed),
+        'split': split,
+        'lumped': lumped,
+        'families_added': sorted(set(new.families) - set(old.families)),
+        'families_removed': sorted(set(old.families) - set(new.families)),
+        'families_changed': sorted([
+            family for family in set(old.families) & set(new.families)
+            if row_hash(old.families[family], FAMILY_FIELDS) != row_hash(new.families[family], FAMILY_FIELDS)
+        ])
+    }
+
+
+def get_affected_families(changes, old, new):
+    families = set(changes['families_added']) | set(changes['families_removed']) | set(changes['families_changed'])
+    for name in changes['added']:
+        families.add(new.species[name]['family'])
+    for name in changes['removed']:
+        families.add(old.species[name]['family'])
+    for name in changes['changed']:
+        families.add(old.species[name]['family'])
+        families.add(new.species[name]['family'])
+    for kind in ('renamed', 'split', 'lumped'):
+        for before, after in changes[kind]:
+            families.add(species_row(old, new, before)['family'])
+            families.add(new.species[after]['family'])
+    return sorted(families)
+
+
+def write_changes(path, changes, old, new):
+    with open(path, 'w', newline='') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(['change', 'old_genus', 'old_species', 'new_genus', 'new_species', 'old_family', 'new_family'])
+        for name in changes['added']:
+            writer.writerow(['added', '', ''] + list(name) + ['', new.species[name]['family']])
+        for name in changes['removed']:
+            writer.writerow(['removed'] + list(name) + ['', '', old.species[name]['family'], ''])
+        for name in changes['changed']:
+            writer.writerow(['changed'] + list(name) + list(name) + [old.species[name]['family'], new.species[name]['family']])
+        for kind in ('renamed', 'split', 'lumped'):
+            for before, after in changes[kind]:
+                writer.writerow([kind] + list(before) + list(after) + [species_row(old, new, before)['family'], new.species[after]['family']])
+
+
+def _name_params(before, after):
+    return {'old_genus': before[0], 'old_species': before[1], 'new_genus': after[0], 'new_species': after[1]}
+
+
+def apply_changes(connection, changes, old, new, taxonomy_id):
+    """Apply the deltas to family, species and taxonomies on one connection
+    (the caller owns the transaction)"""
+    insert_species = text("INSERT INTO species ({0}) VALUES ({1});".format(
+        ", ".join(SPECIES_COLUMNS), ", ".join([":{}".format(column) for column in SPECIES_COLUMNS])
+    ))
+    update_species = text("UPDATE species SET {0} WHERE genus = :genus AND species = :species;".format(
+        ", ".join(["{0} = :{0}".format(column) for column in SPECIES_COLUMNS if column not in ('genus', 'species')])
+    ))
+    delete_species = text("DELETE FROM species WHERE genus = :genus AND species = :species;")
+    delete_taxonomies = text("DELETE FROM taxonomies WHERE genus = :genus AND species = :species;")
+    repoint_taxonomies = text("""
+        UPDATE taxonomies SET genus = :new_genus, species = :new_species
+        WHERE genus = :old_genus AND species = :old_species;
+        """)
+    inherit_taxonomies = text("""
+        INSERT INTO taxonomies (taxonomy_id, genus, species, alt_genus, alt_species)
+        SELECT taxonomy_id, :new_genus, :new_species, alt_genus, alt_species
+        FROM taxonomies
+        WHERE genus = :old_genus AND species = :old_species;
+        """)
+    add_alternate = text("""
+        INSERT INTO taxonomies (taxonomy_id, genus, species, alt_genus, alt_species)
+        SELECT :taxonomy_id, :new_genus, :new_species, :old_genus, :old_species
+        WHERE NOT EXISTS (
+            SELECT 1 FROM taxonomies
+            WHERE taxonomy_id = :taxonomy_id
+                AND genus = :new_genus AND species = :new_species
+                AND alt_genus = :old_genus AND alt_species = :old_species
+        );
+        """)
+    for family in changes['families_added']:
+        connection.execute(text("INSERT INTO family ({0}) VALUES ({1});".format(
+            ", ".join(FAMILY_COLUMNS), ", ".join([":{}".format(column) for column in FAMILY_COLUMNS])
+        )), new.families[family])
+    # species rows first, so crosswalk rows always point at a reference name
+    for name in changes['added']:
+        connection.execute(insert_species, new.species[name])
+    for name in changes['changed']:
+        connection.execute(update_species, new.species[name])
+    for before, after in changes['renamed']:
+        connection.execute(delete_species, old.species[before])
+        connection.execute(insert_species, new.species[after])
+        connection.execute(repoint_taxonomies, _name_params(before, after))
+        connection.execute(add_alternate, dict(_name_params(before, after), taxonomy_id=taxonomy_id))
+    for parent, daughter in changes['split']:
+        connection.execute(insert_species, new.species[daughter])
+        connection.execute(inherit_taxonomies, _name_params(parent, daughter))
+        connection.execute(add_alternate, dict(_name_params(parent, daughter), taxonomy_id=taxonomy_id))
+    for before, into in changes['lumped']:
+        connection.execute(delete_species, old.species[before])
+        connection.execute(repoint_taxonomies, _name_params(before, into))
+        connection.execute(add_alternate, dict(_name_params(before, into), taxonomy_id=taxonomy_id))
+    # removals go last so split daughters have already inherited alternates
+    for name in changes['removed']:
+        connection.execute(delete_species, old.species[name])
+        connection.execute(delete_taxonomies, old.species[name])
+    for family in changes['families_removed']:
+        connection.execute(text("DELETE FROM family WHERE name = :name;"), {'name': family})
+
+
+def main():
+    args = get_args()
+    logging.basicConfig(level=logging.INFO)
+    old = IOCList(args.old_xml)
+    new = IOCList(args.new_xml)
+    logging.info("Comparing IOC version {} to {}".format(old.version, new.version))
+    changes = diff_ioc(old, new)
+    for kind in ('added', 'removed', 'changed', 'renamed', 'split', 'lumped'):
+        print("{}: {}".format(kind.title(), len(changes[kind])))
+    write_changes(args.output, changes, old, new)
+    families = get_affected_families(changes, old, new)
+    print("Affected families: {}".format(", ".join(families)))
+    if args.affected_families is not None:
+        with open(args.affected_families, 'w') as outfile:
+            for family in families:
+                outfile.write("{}\n".format(family))
+    if args.dry_run:
+        return
+    if args.taxonomy_id is None:
+        raise ValueError("--taxonomy-id is required to apply changes")
+    engine = get_engine(args.access_path)
+    with engine.begin() as connection:
+        apply_changes(connection, changes, old, new, args.taxonomy_id)
+    logging.info("Applied IOC version {}".format(new.version))
+
+
+if __name__ == '__main__':
+    main()
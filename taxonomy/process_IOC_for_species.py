@@ -9,62 +9,231 @@ This code is distributed under a 3-clause BSD license. Please see
 LICENSE.txt for more information.
 
 Created on 05 August 2017 10:56 CDT (-0500)
+
+Stream the IOC master list (XML) into species and family CSV files and,
+optionally, COPY them straight into the species and family tables.  The XML
+is read with iterparse and each element is cleared once it has been used, so
+memory stays flat no matter how long the list is.  The XML is only
+downloaded when no local copy exists (or never, with --offline).
 '''
 
 import os
+import csv
+import argparse
+import configparser
 import urllib.request
 import logging
 import xml.etree.ElementTree as etree
 
+from sqlalchemy import create_engine
+
 import pdb
 
 
-def main():
-    # setup logging
-    logging.basicConfig(level=logging.INFO)
+IOC_URL = 'http://www.worldbirdnames.org/master_ioc-names_xml.xml'
+
+SPECIES_COLUMNS = ('ordr', 'family', 'genus', 'species', 'authority', 'common', 'breeding', 'extinct')
+
+# the family table only carries the name; rows also have ordr and common
+FAMILY_COLUMNS = ('name',)
+
+SUBSPECIES_COLUMNS = ('genus', 'species', 'subspecies', 'authority')
+
+
+class FullPaths(argparse.Action):
+    """Expand user- and relative-paths"""
+    def __call__(self, parser, namespace, values, option_string=None):
+        setattr(namespace, self.dest, os.path.abspath(os.path.expanduser(values)))
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description="""Stream the IOC XML list to CSV and optionally bulk load it""",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        '--xml',
+        action=FullPaths,
+        default='master_ioc-names_xml.xml',
+        help="""The local copy of the IOC XML list."""
+    )
+    parser.add_argument(
+        '--offline',
+        action='store_true',
+        default=False,
+        help="""Never download the list; fail if the local copy is missing."""
+    )
+    parser.add_argument(
+        '--species-output',
+        action=FullPaths,
+        default='output_species.csv',
+        help="""The species CSV to write."""
+    )
+    parser.add_argument(
+        '--family-output',
+        action=FullPaths,
+        default='output_family.csv',
+        help="""The family CSV to write."""
+    )
+    parser.add_argument(
+        '--load',
+        action='store_true',
+        default=False,
+        help="""COPY the CSVs into the species and family tables."""
+    )
+    parser.add_argument(
+        '--replace',
+        action='store_true',
+        default=False,
+        help="""With --load, empty species and family before loading (in the same transaction)."""
+    )
+    parser.add_argument(
+        '--access-path',
+        default='access.conf',
+        help="""The path to the database access.conf file."""
+    )
+    return parser.parse_args()
+
+
+def get_engine(path):
+    db_conf = configparser.ConfigParser()
+    db_conf.read(path)
+    openwings = db_conf['openwings']
+    return create_engine("postgresql://{0}:{1}@{2}:{3}/{4}".format(
+            openwings['user'],
+            openwings['password'],
+            openwings.get('host', 'localhost'),
+            openwings.get('port', '5432'),
+            openwings.get('database', 'openwings')
+        ))
+
+
+def fetch_ioc_xml(path, offline=False):
     logging.info('Checking for earlier version of file')
-    # check to see if previous version of file exists
-    if not os.path.isfile('master_ioc-names_xml.xml'):
-        logging.info('File not found, downloading...')
-        # download the xml version of the IOC list
-        urllib.request.urlretrieve('http://www.worldbirdnames.org/master_ioc-names_xml.xml', 'master_ioc-names_xml.xml')
-    else:
+    if os.path.isfile(path):
         logging.info('File found.  Using existing file.')
-    tree = etree.parse('master_ioc-names_xml.xml')
-    root = tree.getroot()
-    logging.info("Processing {}, version {}, year {}".format(root.tag, root.attrib["version"], root.attrib["year"]))
-    main = root.find('list')
-    name_lengths = {'order':0, 'family':0, 'genus':0, 'species':0, 'auth':0, 'common':0, 'breeding':0}
-    with open('output_species.csv', 'w') as outfile:
-        names = {'order':'', 'family':'', 'genus':'', 'species':'', 'auth':'', 'common':'', 'breeding':'', 'extinct':''}
-        for order in main.findall('order'):
-            names['order'] = order.find('latin_name').text.strip().title()
-            for family in order.findall('family'):
-                names['family'] = family.find('latin_name').text.strip()
-                for genus in family.findall('genus'):
-                    names['genus'] = genus.find('latin_name').text.strip()
-                    for species in genus.findall('species'):
-                        names['species'] = species.find('latin_name').text.strip()
-                        names['auth'] = species.find('authority').text.replace(",", "").strip("()").strip()
-                        names['common'] = species.find('english_name').text.strip()
-                        names['breeding'] = species.find('breeding_regions').text.strip()
-                        try:
-                            if species.attrib["extinct"] == "yes":
-                                names['extinct']=True
-                        except KeyError:
-                                names['extinct']=False
-                        #pdb.set_trace()
-                        outfile.write("""{order},{family},{genus},{species},"{auth}",{common},"{breeding}",{extinct}\n""".format(**names))
-                        for k in ['order','family','genus','species','auth','common','breeding']:
-                            if len(names[k]) > name_lengths[k]:
-                                name_lengths[k] = len(names[k])
-
-        print(name_lengths)
-
-            #pdb.set_trace()
-    #print(order.tag, order.attrib)
+    elif offline:
+        raise IOError("{} not found and --offline was given".format(path))
+    else:
+        logging.info('File not found, downloading...')
+        urllib.request.urlretrieve(IOC_URL, path)
+    return path
+
+
+def _text(element, tag):
+    child = element.find(tag)
+    if child is None or child.text is None:
+        return ''
+    return child.text.strip()
+
+
+def iterparse_ioc(path):
+    """Yield ('root', attrib) once, then ('family', row), ('species', row)
+    and ('subspecies', row) tuples in list order.  Rows are dicts holding (at least)
+    FAMILY_COLUMNS, SPECIES_COLUMNS or SUBSPECIES_COLUMNS."""
+    names = {'order': '', 'family': '', 'genus': '', 'species': ''}
+    tags = []
+    for event, element in etree.iterparse(path, events=('start', 'end')):
+        if event == 'start':
+            tags.append(element.tag)
+            if len(tags) == 1:
+                yield 'root', dict(element.attrib)
+            continue
+        tags.pop()
+        if element.tag == 'latin_name' and tags and tags[-1] in ('order', 'family', 'genus', 'species'):
+            name = (element.text or '').strip()
+            names[tags[-1]] = name.title() if tags[-1] == 'order' else name
+        elif element.tag == 'subspecies' and tags and tags[-1] == 'species':
+            yield 'subspecies', {
+                'genus': names['genus'],
+                'species': names['species'],
+                'subspecies': _text(element, 'latin_name'),
+                'authority': _text(element, 'authority').replace(",", "").strip("()").strip()
+            }
+            element.clear()
+        elif element.tag == 'species' and tags and tags[-1] == 'genus':
+            yield 'species', {
+                'ordr': names['order'],
+                'family': names['family'],
+                'genus': names['genus'],
+                'species': _text(element, 'latin_name'),
+                'authority': _text(element, 'authority').replace(",", "").strip("()").strip(),
+                'common': _text(element, 'english_name'),
+                'breeding': _text(element, 'breeding_regions'),
+                'extinct': element.attrib.get('extinct') == 'yes'
+            }
+            element.clear()
+        elif element.tag in ('genus', 'family', 'order'):
+            if element.tag == 'family':
+                yield 'family', {
+                    'name': names['family'],
+                    'ordr': names['order'],
+                    'common': _text(element, 'english_name')
+                }
+            # drop the (already cleared) children we no longer need
+            element.clear()
+
+
+def write_ioc_csv(path, species_output, family_output):
+    """Stream the list to two CSV files; return (list attrib, name lengths)"""
+    attrib = {}
+    name_lengths = {column: 0 for column in SPECIES_COLUMNS if column != 'extinct'}
+    with open(species_output, 'w', newline='') as species_file, open(family_output, 'w', newline='') as family_file:
+        species_writer = csv.writer(species_file)
+        family_writer = csv.writer(family_file)
+        for kind, row in iterparse_ioc(path):
+            if kind == 'root':
+                attrib = row
+                logging.info("Processing {}, version {}, year {}".format(
+                    os.path.basename(path), row.get("version"), row.get("year")
+                ))
+            elif kind == 'family':
+                family_writer.writerow([row[column] for column in FAMILY_COLUMNS])
+            elif kind == 'species':
+                species_writer.writerow([row[column] for column in SPECIES_COLUMNS])
+                for column in name_lengths:
+                    if len(row[column]) > name_lengths[column]:
+                        name_lengths[column] = len(row[column])
+    return attrib, name_lengths
 
 
+def copy_csv(cursor, table, columns, path):
+    with open(path, newline='') as infile:
+        cursor.copy_expert(
+            "COPY {0} ({1}) FROM STDIN WITH (FORMAT csv)".format(table, ", ".join(columns)),
+            infile
+        )
+
+
+def load_ioc_csv(engine, species_output, family_output, replace=False):
+    """COPY both CSVs in a single transaction"""
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        if replace:
+            cursor.execute("DELETE FROM species;")
+            cursor.execute("DELETE FROM family;")
+        copy_csv(cursor, 'family', FAMILY_COLUMNS, family_output)
+        copy_csv(cursor, 'species', SPECIES_COLUMNS, species_output)
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+
+def main():
+    args = get_args()
+    # setup logging
+    logging.basicConfig(level=logging.INFO)
+    fetch_ioc_xml(args.xml, args.offline)
+    attrib, name_lengths = write_ioc_csv(args.xml, args.species_output, args.family_output)
+    print(name_lengths)
+    if args.load:
+        logging.info("Loading IOC version {} into species and family".format(attrib.get("version")))
+        load_ioc_csv(get_engine(args.access_path), args.species_output, args.family_output, args.replace)
+
 
 if __name__ == '__main__':
     main()